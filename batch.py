@@ -0,0 +1,303 @@
+"""
+Batch extraction over many drawings.
+
+    python batch.py "drawings/" "archive/**/*.pdf" @tonight.txt --workers 0 --output results.jsonl
+
+Inputs may be directories (searched recursively for PDFs), glob patterns, PDF paths, or
+@files listing one path per line. By default the work is split into (file, page range) chunks
+that every worker of the process pool takes from one shared queue, so a 400-sheet package is
+spread over all workers instead of keeping one busy while the others idle (--schedule files
+hands out whole files instead). A file that fails (corrupt PDF, worker crash) is reported and
+the run goes on. Results are written as JSON Lines in the sorted input order, followed by a
+throughput summary on stderr.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import patterns as pattern_registry
+from extractor import ENGINES, collect_results, extract_page_chunk, iter_pages, iter_with_values, open_document, select_pages
+
+# Pages per (file, page range) task of the page-level scheduler
+DEFAULT_CHUNK_SIZE = 8
+
+def expand_inputs(inputs):
+    """Resolves directories, globs, paths and @list files to a sorted, de-duplicated list of PDF paths."""
+    paths = set()
+    for item in inputs:
+        if item.startswith("@"):
+            with open(item[1:], encoding="utf-8") as listing:
+                paths.update(expand_inputs(line.strip() for line in listing if line.strip()))
+        elif os.path.isdir(item):
+            for folder, _, file_names in os.walk(item):
+                paths.update(os.path.join(folder, name) for name in file_names if name.lower().endswith(".pdf"))
+        elif glob.has_magic(item):
+            paths.update(path for path in glob.glob(item, recursive=True) if os.path.isfile(path))
+        else:
+            paths.add(item)
+    return sorted(paths)
+
+def extract_file(pdf_path, options=None, dimension_patterns=None):
+    """
+    Process-pool task: extracts one file and never raises.
+    Returns {"path", "pages", "seconds", "result"} or {"path", "pages": 0, "seconds", "error"}.
+    `dimension_patterns` is the parent's registry (see get_dimension_patterns), mirrored in the worker.
+    """
+    start = time.perf_counter()
+    try:
+        # Registered patterns do not survive a spawn-started worker
+        if dimension_patterns is not None:
+            pattern_registry.set_dimension_patterns(dimension_patterns)
+        page_results = list(iter_pages(pdf_path, **(options or {})))
+        return {
+            "path": pdf_path,
+            "pages": len(page_results),
+            "seconds": time.perf_counter() - start,
+            "result": collect_results(page_results),
+        }
+    except Exception as e:
+        return {"path": pdf_path, "pages": 0, "seconds": time.perf_counter() - start, "error": f"{type(e).__name__}: {e}"}
+
+def _extract_isolated(pdf_path, options, dimension_patterns=None):
+    """Runs one file in a dedicated worker process, so a crash can only take this file down."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(extract_file, pdf_path, options, dimension_patterns).result()
+        except BrokenProcessPool:
+            return {"path": pdf_path, "pages": 0, "seconds": 0.0, "error": "BrokenProcessPool: worker process died"}
+
+def iter_batch(paths, workers=None, options=None):
+    """
+    Yields the extract_file() outcome of every path, in the order of `paths`.
+    At most 2 * workers files are in flight. If a worker process dies, the unfinished files that were
+    in flight are re-run one at a time in their own process (so only the culprit fails) and a fresh
+    pool takes over the rest of the batch.
+    """
+    workers = workers or os.cpu_count()
+    paths = list(paths)
+    if workers <= 1:
+        for pdf_path in paths:
+            yield extract_file(pdf_path, options)
+        return
+
+    dimension_patterns = pattern_registry.get_dimension_patterns()
+    next_index = 0
+    in_flight = deque() # (path, future), oldest first
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while next_index < len(paths) or in_flight:
+            while next_index < len(paths) and len(in_flight) < 2 * workers:
+                pdf_path = paths[next_index]
+                in_flight.append((pdf_path, executor.submit(extract_file, pdf_path, options, dimension_patterns)))
+                next_index += 1
+
+            # Waiting on the oldest future keeps the output in input order
+            pdf_path, future = in_flight[0]
+            try:
+                outcome = future.result()
+            except BrokenProcessPool:
+                executor.shutdown(wait=False, cancel_futures=True)
+                for pending_path, pending_future in in_flight:
+                    finished = pending_future.done() and not pending_future.cancelled()
+                    if finished and pending_future.exception() is None:
+                        yield pending_future.result()
+                    else:
+                        yield _extract_isolated(pending_path, options, dimension_patterns)
+                in_flight.clear()
+                executor = ProcessPoolExecutor(max_workers=workers)
+                continue
+            in_flight.popleft()
+            yield outcome
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+# --- Page-level scheduling ---
+
+def _probe_file(pdf_path, pages):
+    """Process-pool task: returns ("ok", selected page numbers) or ("error", message); never raises."""
+    try:
+        with open_document(pdf_path) as doc:
+            return "ok", select_pages(doc, pages)
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}"
+
+def _extract_chunk(pdf_path, page_nums, region_matcher, dimension_patterns, low_memory, engine):
+    """Process-pool task: extract_page_chunk() returning ("ok", raw page results) or ("error", message)."""
+    try:
+        return "ok", extract_page_chunk(pdf_path, page_nums, region_matcher, dimension_patterns, low_memory, engine)
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}"
+
+def _finish_file(state):
+    """Reassembles a file's chunks in page order into an extract_file() outcome."""
+    seconds = time.perf_counter() - state["start"]
+    if state["error"]:
+        return {"path": state["path"], "pages": 0, "seconds": seconds, "error": state["error"]}
+    raw_pages = [page_result for chunk in state["chunks"] for page_result in chunk]
+    return {
+        "path": state["path"],
+        "pages": len(raw_pages),
+        "seconds": seconds,
+        "result": collect_results(iter_with_values(raw_pages)),
+    }
+
+def iter_batch_pages(paths, workers=None, options=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    iter_batch() with page-level scheduling: every file is split into chunks of `chunk_size` pages and all
+    chunks go to one shared pool queue, from which idle workers take the next task whatever its file.
+    Page counts are probed inside the pool too. A file's chunks are put back together in page order when its
+    last chunk finishes, and outcomes are yielded in the order of `paths`, matching extract_file().
+    At most 4 * workers files are open at a time; if a worker process dies, the files with unfinished chunks
+    are re-run one at a time in their own process (as in iter_batch) and a fresh pool takes over.
+    """
+    workers = workers or os.cpu_count()
+    options = options or {}
+    paths = list(paths)
+    if workers <= 1:
+        for pdf_path in paths:
+            yield extract_file(pdf_path, options)
+        return
+
+    selection = options.get("pages")
+    region_matcher = options.get("region_matcher")
+    low_memory = options.get("low_memory", False)
+    engine = options.get("engine", "regex")
+    dimension_patterns = pattern_registry.get_dimension_patterns()
+
+    states = {} # file index -> {"path", "start", "chunks", "remaining", "error", "outcome"}
+    tasks = {} # future -> (file index, chunk index), chunk index None for the page-count probe
+    next_index = next_output = 0
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while next_output < len(paths):
+            while next_index < len(paths) and next_index - next_output < 4 * workers:
+                pdf_path = paths[next_index]
+                states[next_index] = {
+                    "path": pdf_path, "start": time.perf_counter(),
+                    "chunks": None, "remaining": 0, "error": None, "outcome": None,
+                }
+                tasks[executor.submit(_probe_file, pdf_path, selection)] = (next_index, None)
+                next_index += 1
+
+            if states[next_output]["outcome"] is not None:
+                yield states.pop(next_output)["outcome"]
+                next_output += 1
+                continue
+
+            done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+            try:
+                for future in done:
+                    file_index, chunk_index = tasks.pop(future)
+                    state = states[file_index]
+                    status, payload = future.result()
+                    if state["outcome"] is not None:
+                        continue # Another chunk of this file already failed
+                    if status == "error":
+                        state["error"] = payload
+                    elif chunk_index is None:
+                        chunks = [payload[start:start + chunk_size] for start in range(0, len(payload), chunk_size)]
+                        state["chunks"] = [None] * len(chunks)
+                        state["remaining"] = len(chunks)
+                        for index, page_nums in enumerate(chunks):
+                            task = executor.submit(_extract_chunk, state["path"], page_nums, region_matcher,
+                                                   dimension_patterns, low_memory, engine)
+                            tasks[task] = (file_index, index)
+                    else:
+                        state["chunks"][chunk_index] = payload
+                        state["remaining"] -= 1
+                    if state["error"] or state["remaining"] == 0:
+                        state["outcome"] = _finish_file(state)
+            except BrokenProcessPool:
+                executor.shutdown(wait=False, cancel_futures=True)
+                for file_index in sorted({file_index for file_index, _ in tasks.values()} | {file_index}):
+                    state = states[file_index]
+                    if state["outcome"] is None:
+                        state["outcome"] = _extract_isolated(state["path"], options, dimension_patterns)
+                tasks.clear()
+                executor = ProcessPoolExecutor(max_workers=workers)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def outcome_to_json(outcome):
+    """JSON-serialisable form of an extract_file() outcome."""
+    record = {key: value for key, value in outcome.items() if key != "result"}
+    if "result" in outcome:
+        result = dict(outcome["result"])
+        result["dimensions"] = [dimension.to_dict() for dimension in result["dimensions"]]
+        record["result"] = result
+    return record
+
+def run_batch(inputs, output=None, workers=None, options=None, table_path=None, schedule="pages"):
+    """
+    Runs a batch and writes one JSON line per file to `output` (a file object, default stdout).
+    `schedule` is "pages" (iter_batch_pages, the default) or "files" (iter_batch).
+    Optionally saves all dimensions as one columnar table (see columnar.DimensionTable) to `table_path`.
+    Returns the summary dict that is also printed to stderr.
+    """
+    output = output or sys.stdout
+    paths = expand_inputs(inputs)
+    tables = []
+    if table_path:
+        # Only needed for the columnar output
+        from columnar import DimensionTable
+
+    files = pages = 0
+    failures = []
+    start = time.perf_counter()
+    outcomes = iter_batch_pages(paths, workers, options) if schedule == "pages" else iter_batch(paths, workers, options)
+    for outcome in outcomes:
+        files += 1
+        pages += outcome["pages"]
+        if "error" in outcome:
+            failures.append((outcome["path"], outcome["error"]))
+        elif table_path:
+            tables.append(DimensionTable.from_records(outcome["result"]["dimensions"], document=outcome["path"]))
+        output.write(json.dumps(outcome_to_json(outcome), ensure_ascii=False) + "\n")
+    elapsed = time.perf_counter() - start
+
+    if table_path:
+        DimensionTable.concat(tables).save(table_path)
+
+    summary = {
+        "files": files,
+        "pages": pages,
+        "failures": len(failures),
+        "seconds": elapsed,
+        "files_per_second": files / elapsed if elapsed else 0.0,
+        "pages_per_second": pages / elapsed if elapsed else 0.0,
+    }
+    print(f"\nProcessed {files} files ({pages} pages) in {elapsed:.1f}s: "
+          f"{summary['files_per_second']:.1f} files/s, {summary['pages_per_second']:.1f} pages/s", file=sys.stderr)
+    if failures:
+        print(f"{len(failures)} failed:", file=sys.stderr)
+        for pdf_path, error in failures:
+            print(f"  {pdf_path}: {error}", file=sys.stderr)
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract dimensions from many PDF drawings in parallel.")
+    parser.add_argument("inputs", nargs="+", help="PDF files, directories, glob patterns or @file lists")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--output", help="JSON Lines output file (default: stdout)")
+    parser.add_argument("--table", help="Also save every dimension as one columnar .npz table")
+    parser.add_argument("--low-memory", action="store_true",
+                        help="Empty MuPDF's store after every page so worker memory stays flat on long runs")
+    parser.add_argument("--schedule", choices=("pages", "files"), default="pages",
+                        help="Share page-range chunks across all workers (default) or hand out whole files")
+    parser.add_argument("--engine", choices=ENGINES, default="regex", help="Line classification engine (same results)")
+    args = parser.parse_args()
+    options = {"low_memory": args.low_memory, "engine": args.engine}
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            summary = run_batch(args.inputs, output_file, args.workers, options, args.table, args.schedule)
+    else:
+        summary = run_batch(args.inputs, workers=args.workers, options=options, table_path=args.table,
+                            schedule=args.schedule)
+    sys.exit(1 if summary["failures"] else 0)
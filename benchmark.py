@@ -0,0 +1,386 @@
+"""
+Micro-benchmarks for the dimension extractor.
+
+Run one section at a time, e.g.:
+    python benchmark.py classifier --lines 200000
+    python benchmark.py images --pages 20
+    python benchmark.py adversarial --length 8000
+    python benchmark.py bulk --lines 3000
+    python benchmark.py tokenizer --fuzz 200000 drawing.pdf
+    python benchmark.py regions --pages 40
+Each section prints its timings and exits non-zero if the compared code paths disagree.
+"""
+import argparse
+import math
+import random
+import sys
+import time
+import tracemalloc
+
+import fitz
+
+import patterns as pattern_registry
+import tokenizer
+from extractor import MAX_LINE_LENGTH, TEXT_FLAGS, extract_page, read_page_lines
+from extractor import detect_regions, page_lines, read_page_blocks, region_search_rects
+
+# Lines of the kind found on our drawings: dimensions, callouts, view labels and notes
+SAMPLE_LINES = [
+    "Ø.201", "8X Ø.201", "2X ⌀.500 THRU", "R2.250", "R17/32", "60°", "2X 45°", "10-32 UNF", "8-32 UNC",
+    "3/16", "4.50", "1,500", ".750", "8,89", "12.5x", "1.05", "3,728", "+0.01 -0.02",
+    "SECTION A-A", "DETAIL B", "SEE NOTE 3", "SCALE 2:1",
+    "NOTES: REMOVE BURRS AND BREAK SHARP EDGES", "ANODIZE PER MIL-A-8625 TYPE II",
+    "ALL DIMENSIONS ARE IN INCHES UNLESS OTHERWISE SPECIFIED",
+]
+
+def make_lines(count, seed=0):
+    """Returns `count` lines drawn from SAMPLE_LINES with a fixed seed."""
+    rng = random.Random(seed)
+    return [rng.choice(SAMPLE_LINES) for _ in range(count)]
+
+def time_per_line(function, lines, repeat=3):
+    """Best-of-`repeat` throughput of `function` over `lines`, in lines per second."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            function(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+def bench_classifier(args):
+    lines = make_lines(args.lines)
+    classifier = pattern_registry.get_classifier()
+
+    mismatches = [line for line in set(lines) if classifier.classify(line) != classifier.classify_combined(line)]
+    if mismatches:
+        print(f"Combined classifier disagrees with the cascade on: {mismatches}")
+        return 1
+
+    cascade_rate = time_per_line(classifier.classify, lines)
+    combined_rate = time_per_line(classifier.classify_combined, lines)
+    tokens_rate = time_per_line(lambda line: list(classifier.tokens(line)), lines)
+    print(f"Cascade ({len(classifier.entries)} patterns): {cascade_rate:12,.0f} lines/s")
+    print(f"Combined alternation:   {combined_rate:12,.0f} lines/s ({combined_rate / cascade_rate:.2f}x)")
+    print(f"Token stream (finditer): {tokens_rate:11,.0f} lines/s")
+    return 0
+
+# Repeated units of garbled text layers: runs of digits, whitespace, 'O's, multipliers and separators
+# that give the patterns' quantifiers the most ways to backtrack
+ADVERSARIAL_UNITS = [
+    "1", "0", " ", "\t", "O", "X", "R", ".", ",", "+", "°", "Ø ", "1 ", " 0", "0 ", "00 ", "O ", "X ", "1X",
+    "1 x", "0X", "1.", "1,", "1-", "1/", "1°", "R ", "R1", "1in", "1-1 ", "+ 1",
+]
+
+def match_seconds(function, text, repeat=5, budget=float("inf")):
+    """Best-of-`repeat` time of one call of `function` on `text`; a call over `budget` seconds is not repeated."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+        if best > budget:
+            break
+    return best
+
+def bench_adversarial(args):
+    classifier = pattern_registry.get_classifier()
+    targets = [(dim_type, compiled_pattern.search) for compiled_pattern, dim_type in classifier.entries]
+    targets += [
+        ("Part number", pattern_registry.PART_NUMBER_PATTERN.search),
+        ("Tolerance", lambda text: list(pattern_registry.TOLERANCE_PATTERN.finditer(text))),
+        ("classify", classifier.classify),
+        ("classify_combined", classifier.classify_combined),
+        ("tokens", lambda text: list(classifier.tokens(text))),
+    ]
+    # The extractor never runs the regexes on longer lines; the sizes go well past that so the growth shows
+    lengths = [args.length, args.length * 2, args.length * 4]
+    print(f"Lines of {', '.join(map(str, lengths))} characters (extractor cap: {MAX_LINE_LENGTH}), "
+          f"{len(ADVERSARIAL_UNITS)} units x {len(targets)} targets")
+
+    failures = []
+    worst = (0.0, None)
+    for unit in ADVERSARIAL_UNITS:
+        # The trailing '#' makes every attempt fail at the very end of the line
+        texts = [(unit * length)[:length] + "#" for length in lengths]
+        for name, function in targets:
+            seconds = []
+            for text in texts:
+                seconds.append(match_seconds(function, text, budget=args.budget))
+                if seconds[-1] > args.budget:
+                    break
+            if seconds[-1] > args.budget:
+                failures.append(f"{name} on {lengths[len(seconds) - 1]} characters of {unit!r}: "
+                                f"{seconds[-1]:.2f} s for one match")
+                continue
+            # Growth exponent between the two longest lines: 1 is linear, 2 quadratic.
+            # Calls too fast to time reliably count as linear.
+            exponent = math.log2(seconds[-1] / seconds[-2]) if seconds[-1] > 1e-4 else 1.0
+            if exponent > worst[0]:
+                worst = (exponent, f"{name} on {unit!r}")
+            if exponent > args.max_exponent:
+                failures.append(f"{name} on {unit!r}: time grows as n^{exponent:.2f} "
+                                f"({seconds[-1] * 1000:.2f} ms at {lengths[-1]} characters)")
+
+    print(f"Worst growth: n^{worst[0]:.2f} ({worst[1]})")
+    if failures:
+        print("Superlinear matching:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+def make_dense_line(rng):
+    """One random dimension, callout or note, so a dense sheet holds thousands of distinct lines."""
+    number = f"{rng.randint(0, 99)}{rng.choice('.,')}{rng.randint(0, 999):03d}"
+    return rng.choice([
+        f"Ø{number}", f"{rng.randint(2, 12)}X Ø{number}", f"R{number}", f"{rng.randint(1, 179)}°",
+        f"{rng.randint(2, 12)}-{rng.randint(10, 40)} UNF", f"{rng.randint(1, 15)}/{rng.choice([2, 4, 8, 16, 32])}",
+        number, number, number, number, f"{number} ±{number}",
+        f"SEE NOTE {rng.randint(1, 20)}", f"DETAIL {rng.choice('ABCDEFG')}{rng.randint(1, 99)}",
+    ])
+
+def make_dense_sheets(pages, lines, seed=0):
+    """An in-memory package of A0 sheets carrying `lines` random lines each."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    columns = 12
+    for _ in range(pages):
+        page = doc.new_page(width=3370, height=2384)
+        for index in range(lines):
+            row, column = divmod(index, columns)
+            page.insert_text((20 + column * 275, 20 + row * 2300 / (lines / columns)), make_dense_line(rng),
+                             fontsize=4)
+    return doc
+
+def extract_seconds(doc, engine, repeat=3):
+    """Best-of-`repeat` time of extract_page() over every page, with the page results."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        page_results = [extract_page(page, page_num, engine=engine) for page_num, page in enumerate(doc)]
+        best = min(best, time.perf_counter() - start)
+    return best, page_results
+
+def bench_bulk(args):
+    doc = make_dense_sheets(args.pages, args.lines)
+    classifier = pattern_registry.get_classifier()
+    # The distinct candidate lines of each page, as extract_page() classifies them
+    page_texts = [[text for text in dict.fromkeys(line["text"].strip() for line in read_page_lines(page, TEXT_FLAGS))
+                   if classifier.may_match(text)] for page in doc]
+    texts = [text for page in page_texts for text in page]
+
+    def first_matches(found):
+        return [item and (item[0][1], item[1].group(0)) for item in found]
+
+    bulk_found = [item for page in page_texts for item in classifier.classify_many(page)]
+    if first_matches(bulk_found) != first_matches(map(classifier.match, texts)):
+        print("classify_many() disagrees with match()")
+        return 1
+    regex_seconds, regex_results = extract_seconds(doc, "regex")
+    bulk_seconds, bulk_results = extract_seconds(doc, "bulk")
+    if bulk_results != regex_results:
+        print("The bulk engine changed the page results")
+        return 1
+
+    per_line_rate = time_per_line(classifier.match, texts)
+    # Pages per second times lines per page
+    bulk_rate = time_per_line(classifier.classify_many, page_texts) * len(texts) / len(page_texts)
+    print(f"{args.pages} sheets of {args.lines} lines, {len(texts) / args.pages:.0f} distinct candidate lines per sheet")
+    print(f"Classification, per line (regex): {per_line_rate:12,.0f} lines/s")
+    print(f"Classification, bulk:             {bulk_rate:12,.0f} lines/s ({bulk_rate / per_line_rate:.2f}x)")
+    print(f"extract_page, regex engine: {regex_seconds * 1000 / args.pages:8.1f} ms/page")
+    print(f"extract_page, bulk engine:  {bulk_seconds * 1000 / args.pages:8.1f} ms/page "
+          f"({regex_seconds / bulk_seconds:.2f}x)")
+    return 0
+
+# Characters the patterns treat specially, with look-alikes, Unicode case-folding and non-ASCII digits
+# (re's \d and \s are Unicode-aware), so random lines hit the patterns' corner cases
+FUZZ_ALPHABET = "00123456789OoØø⌀ xX..,,-/°Rr#aIinNmMcC\t\"'İıſK٣_+±"
+
+def regex_classify(classifier, text):
+    """(dim_type, token) of the regex engine for text, as extract_page() reads it off the match, or None."""
+    found = classifier.match(text)
+    if found is None:
+        return None
+    (compiled_pattern, dim_type), match = found
+    return dim_type, match.group(compiled_pattern.groups) if compiled_pattern.groups else match.group(0)
+
+def bench_tokenizer(args):
+    classifier = pattern_registry.get_classifier()
+    if not classifier.default:
+        print("The tokenizer only reproduces the built-in registry")
+        return 1
+
+    # The corpus: sample lines, the lines of the given drawings, garbled lines and random lines
+    doc = make_dense_sheets(args.pages, args.lines)
+    page_texts = [[text for text in dict.fromkeys(line["text"].strip() for line in read_page_lines(page, TEXT_FLAGS))
+                   if classifier.may_match(text)] for page in doc]
+    texts = [text for page in page_texts for text in page]
+    corpus = set(SAMPLE_LINES) | set(texts)
+    for path in args.pdf:
+        with fitz.open(path) as drawing:
+            corpus.update(line["text"].strip() for page in drawing for line in read_page_lines(page, TEXT_FLAGS))
+    corpus.update((unit * MAX_LINE_LENGTH)[:MAX_LINE_LENGTH] for unit in ADVERSARIAL_UNITS)
+    rng = random.Random(args.seed)
+    corpus.update("".join(rng.choice(FUZZ_ALPHABET) for _ in range(rng.randint(0, 16))) for _ in range(args.fuzz))
+
+    disagreements = [text for text in corpus if tokenizer.classify(text) != regex_classify(classifier, text)]
+    print(f"Differential check: {len(corpus):,} distinct lines, {len(disagreements)} disagreements")
+    if disagreements:
+        for text in sorted(disagreements)[:10]:
+            print(f"  {text!r}: regex {regex_classify(classifier, text)}, tokenizer {tokenizer.classify(text)}")
+        return 1
+
+    regex_seconds, regex_results = extract_seconds(doc, "regex")
+    tokenizer_seconds, tokenizer_results = extract_seconds(doc, "tokenizer")
+    if tokenizer_results != regex_results:
+        print("The tokenizer engine changed the page results")
+        return 1
+
+    regex_rate = time_per_line(lambda text: regex_classify(classifier, text), texts)
+    tokenizer_rate = time_per_line(tokenizer.classify, texts)
+    scan_rate = time_per_line(tokenizer.scan, texts)
+    print(f"{args.pages} sheets of {args.lines} lines, {len(texts) / args.pages:.0f} distinct candidate lines per sheet")
+    print(f"Classification, regex cascade: {regex_rate:12,.0f} lines/s")
+    print(f"Classification, tokenizer:     {tokenizer_rate:12,.0f} lines/s ({tokenizer_rate / regex_rate:.2f}x)")
+    print(f"Tokenizer scan() alone:        {scan_rate:12,.0f} lines/s")
+    print(f"extract_page, regex engine:     {regex_seconds * 1000 / args.pages:8.1f} ms/page")
+    print(f"extract_page, tokenizer engine: {tokenizer_seconds * 1000 / args.pages:8.1f} ms/page "
+          f"({regex_seconds / tokenizer_seconds:.2f}x)")
+    return 0
+
+def make_mixed_package(pages, seed=0):
+    """
+    A drawing package whose sheets share two title-block formats but differ elsewhere: some sheets add a
+    material table or title-block keywords the other sheets of their format do not have.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        width, height = rng.choice([(1224, 792), (1584, 1224)])
+        page = doc.new_page(width=width, height=height)
+        for index in range(40):
+            page.insert_text((40 + (index % 5) * 150, 60 + (index // 5) * 40), make_dense_line(rng), fontsize=9)
+        page.insert_text((width - 300, height - 60), "DRAWN BY J. DOE", fontsize=9)
+        page.insert_text((width - 300, height - 40), f"SHEET {rng.randint(1, 99)} OF 99   SCALE 1:1", fontsize=9)
+        if rng.random() < 0.3:
+            page.insert_text((40, height - 80), "MATERIAL: 6061-T6", fontsize=9)
+            page.insert_text((40, height - 60), f"FINISH {rng.randint(1, 99)}", fontsize=9)
+        if rng.random() < 0.2:
+            page.insert_text((width - 500, height - 120), f"REV {rng.choice('ABC')}  {rng.randint(1, 9)}.5", fontsize=9)
+    return doc
+
+def bench_regions(args):
+    doc = make_mixed_package(args.pages)
+    # The pages are kept alive for their textpages
+    pages = list(doc)
+    textpages = [page.get_textpage(flags=TEXT_FLAGS) for page in pages]
+    page_blocks = [read_page_blocks(page, textpage=textpage) for page, textpage in zip(pages, textpages)]
+
+    def detect_all(clipped):
+        return [detect_regions(page_lines(blocks, clip=region_search_rects(page.rect) if clipped else None),
+                               page.rect, textpage=textpage)
+                for page, textpage, blocks in zip(pages, textpages, page_blocks)]
+
+    whole_page = detect_all(clipped=False)
+    mismatches = [page_num for page_num, (whole, clipped) in enumerate(zip(whole_page, detect_all(clipped=True)))
+                  if whole != clipped]
+
+    best = {}
+    for clipped in (False, True):
+        best[clipped] = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            detect_all(clipped)
+            best[clipped] = min(best[clipped], time.perf_counter() - start)
+    print(f"{args.pages} sheets, region detection: whole page {best[False] * 1000 / args.pages:.2f} ms/page, "
+          f"quadrants only {best[True] * 1000 / args.pages:.2f} ms/page")
+    if mismatches:
+        print(f"Regions differ from the whole-page search on pages {mismatches}")
+        return 1
+    print("Identical regions on every page")
+    return 0
+
+def make_image_sheets(pages, images, size, seed=0):
+    """An in-memory drawing package whose sheets carry dimension text and `images` noisy RGB rasters each."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=1224, height=792)
+        for index, line in enumerate(make_lines(60, rng.randrange(2**30))):
+            page.insert_text((40 + (index % 4) * 250, 40 + (index // 4) * 40), line, fontsize=9)
+        for index in range(images):
+            pixmap = fitz.Pixmap(fitz.csRGB, size, size, rng.randbytes(size * size * 3), False)
+            x = 60 + index * 1100 / images
+            page.insert_image(fitz.Rect(x, 450, x + 1000 / images, 750), pixmap=pixmap)
+    return doc
+
+def measure_pages(doc, flags):
+    """Time and Python peak memory of read_page_lines() over every page, with the pages' lines."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    lines = [[(line["text"], tuple(line["bbox"])) for line in read_page_lines(page, flags)] for page in doc]
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak, lines
+
+def bench_images(args):
+    doc = make_image_sheets(args.pages, args.images, args.size)
+    # Warm-up, so both runs find fonts and objects already loaded
+    measure_pages(doc, TEXT_FLAGS)
+
+    full_seconds, full_peak, full_lines = measure_pages(doc, fitz.TEXTFLAGS_DICT)
+    text_seconds, text_peak, text_lines = measure_pages(doc, TEXT_FLAGS)
+    if full_lines != text_lines:
+        print("Leaving out images changed the extracted lines")
+        return 1
+
+    print(f"{args.pages} sheets with {args.images} {args.size}x{args.size} images each")
+    print(f"With images (TEXTFLAGS_DICT): {full_seconds * 1000 / args.pages:8.1f} ms/page, "
+          f"peak {full_peak / 2**20:7.1f} MiB")
+    print(f"Text only (TEXT_FLAGS):       {text_seconds * 1000 / args.pages:8.1f} ms/page, "
+          f"peak {text_peak / 2**20:7.1f} MiB ({full_seconds / text_seconds:.1f}x faster)")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the dimension extractor.")
+    sections = parser.add_subparsers(dest="section", required=True)
+
+    classifier_parser = sections.add_parser("classifier", help="Combined classifier vs. per-pattern cascade")
+    classifier_parser.add_argument("--lines", type=int, default=100000)
+    classifier_parser.set_defaults(run=bench_classifier)
+
+    images_parser = sections.add_parser("images", help="Text extraction with and without image blocks")
+    images_parser.add_argument("--pages", type=int, default=10)
+    images_parser.add_argument("--images", type=int, default=2, help="Raster images per sheet")
+    images_parser.add_argument("--size", type=int, default=1200, help="Image width and height in pixels")
+    images_parser.set_defaults(run=bench_images)
+
+    adversarial_parser = sections.add_parser("adversarial", help="Pattern match time on garbled lines must grow linearly")
+    adversarial_parser.add_argument("--length", type=int, default=4000, help="Shortest line length; doubled twice")
+    adversarial_parser.add_argument("--max-exponent", type=float, default=1.5,
+                                    help="Fail if match time grows faster than length ** max_exponent")
+    adversarial_parser.add_argument("--budget", type=float, default=1.0, help="Fail if one match takes longer (seconds)")
+    adversarial_parser.set_defaults(run=bench_adversarial)
+
+    bulk_parser = sections.add_parser("bulk", help="Bulk classification of a page's joined lines vs. per-line matching")
+    bulk_parser.add_argument("--pages", type=int, default=5)
+    bulk_parser.add_argument("--lines", type=int, default=3000, help="Lines per sheet")
+    bulk_parser.set_defaults(run=bench_bulk)
+
+    tokenizer_parser = sections.add_parser("tokenizer", help="Hand-written tokenizer vs. the regex cascade: agreement and speed")
+    tokenizer_parser.add_argument("pdf", nargs="*", help="Drawings whose lines join the differential corpus")
+    tokenizer_parser.add_argument("--pages", type=int, default=5)
+    tokenizer_parser.add_argument("--lines", type=int, default=3000, help="Lines per sheet")
+    tokenizer_parser.add_argument("--fuzz", type=int, default=100000, help="Random lines added to the corpus")
+    tokenizer_parser.add_argument("--seed", type=int, default=0)
+    tokenizer_parser.set_defaults(run=bench_tokenizer)
+
+    regions_parser = sections.add_parser("regions", help="Region detection on the quadrants vs. the whole page")
+    regions_parser.add_argument("--pages", type=int, default=40)
+    regions_parser.set_defaults(run=bench_regions)
+
+    args = parser.parse_args()
+    sys.exit(args.run(args))
@@ -0,0 +1,287 @@
+"""
+Persistent result cache for extract_dimensions_from_pdf().
+
+Results are stored in a SQLite file, keyed by a BLAKE2b hash of the PDF bytes combined with
+the extractor version, the dimension pattern set and the extraction options, so a changed
+drawing, pattern or option never returns a stale result. Each path's size and mtime are
+remembered with its content hash, so unchanged files are not even re-hashed. The cache is
+capped in bytes and evicts the least recently used results first.
+
+When a file did change (a new revision of a package), its pages are looked up one by one by
+a fingerprint of their content streams and resources, so only the sheets that actually
+changed are extracted again.
+
+    cache = ResultCache("dimensions_cache.sqlite")
+    results = cache.extract("drawing.pdf")  # or extract_dimensions_from_pdf(path, cache=cache)
+"""
+import hashlib
+import os
+import pickle
+import re
+import sqlite3
+import time
+
+import patterns as pattern_registry
+from extractor import EXTRACTOR_VERSION, KeywordMatcher, collect_results, is_path, iter_pages, source_buffer
+
+# Default size cap of the cache file contents (pickled results), in bytes
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+# Indirect references inside an object's source, and the entries left out of page fingerprints:
+# back-references, and stream encoding keys (the decoded stream is hashed instead)
+_REFERENCE = re.compile(r"(\d+) 0 R")
+_IGNORED_ENTRIES = re.compile(r"/(?:Parent|P)\s*\d+\s+\d+\s+R|/(?:Length|Filter|DecodeParms)\s*(?:\d+(?:\s+\d+\s+R)?|/\w+|\[[^\]]*\]|<<[^>]*>>)")
+
+def file_digest(pdf_path):
+    """BLAKE2b digest (16 bytes) of a file's contents."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(pdf_path, "rb") as pdf_file:
+        for block in iter(lambda: pdf_file.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.digest()
+
+def _resolved_digest(doc, source, memo):
+    """Digest of PDF object source text with every indirect reference replaced by the referenced object's digest."""
+    digest = hashlib.blake2b(digest_size=16)
+    position = 0
+    for reference in _REFERENCE.finditer(source):
+        digest.update(source[position:reference.start()].encode("latin-1", "replace"))
+        digest.update(_object_digest(doc, int(reference.group(1)), memo))
+        position = reference.end()
+    digest.update(source[position:].encode("latin-1", "replace"))
+    return digest.digest()
+
+def _object_digest(doc, xref, memo):
+    """
+    Digest of an object, everything it references and its decoded stream (so recompression does not count as
+    a change); memoized per document in `memo`.
+    """
+    if xref in memo:
+        return memo[xref]
+    memo[xref] = b"" # Cycle guard
+    digest = _resolved_digest(doc, _IGNORED_ENTRIES.sub("", doc.xref_object(xref, compressed=True)), memo)
+    if doc.xref_is_stream(xref):
+        digest = hashlib.blake2b(digest + doc.xref_stream(xref), digest_size=16).digest()
+    memo[xref] = digest
+    return digest
+
+def page_fingerprint(doc, page_num, memo=None):
+    """
+    Digest of what a page's extraction depends on: its content streams, its (possibly inherited) resources
+    with the fonts and forms they reference, its annotations (the textpage includes their text) and its
+    geometry. Object numbers do not enter the digest, so an
+    unchanged sheet keeps its fingerprint when a new revision renumbers or reorders the file.
+    Pass the same `memo` dict for all pages of a document so shared resources are hashed once.
+    """
+    memo = {} if memo is None else memo
+    page = doc[page_num]
+    digest = hashlib.blake2b(digest_size=16)
+    kind, contents = doc.xref_get_key(page.xref, "Contents")
+    digest.update(_resolved_digest(doc, contents, memo))
+
+    # Resources may be inherited from the page tree
+    xref = page.xref
+    kind, resources = doc.xref_get_key(xref, "Resources")
+    while kind == "null":
+        kind, parent = doc.xref_get_key(xref, "Parent")
+        if kind != "xref":
+            break
+        xref = int(parent.split()[0])
+        kind, resources = doc.xref_get_key(xref, "Resources")
+    digest.update(_resolved_digest(doc, resources, memo))
+
+    # Annotations with their appearance streams; their /P back-reference to the page is left out
+    kind, annotations = doc.xref_get_key(page.xref, "Annots")
+    if kind != "null":
+        digest.update(_resolved_digest(doc, annotations, memo))
+
+    digest.update(repr((tuple(page.rect), tuple(page.cropbox), page.rotation)).encode("ascii"))
+    return digest.digest()
+
+def extraction_version():
+    """
+    Fingerprint of everything besides the file and options that determines a result: the extractor
+    version and the current pattern registry (sources, flags and types), so registering a pattern
+    invalidates cached results.
+    """
+    parts = [f"extractor={EXTRACTOR_VERSION}"]
+    for compiled_pattern, dim_type in pattern_registry.get_dimension_patterns():
+        parts.append(f"{dim_type}:{compiled_pattern.flags}:{compiled_pattern.pattern}")
+    for compiled_pattern in (pattern_registry.PART_NUMBER_PATTERN, pattern_registry.TOLERANCE_PATTERN):
+        parts.append(f"{compiled_pattern.flags}:{compiled_pattern.pattern}")
+    return "\n".join(parts)
+
+def _options_key(pages, region_matcher):
+    """Stable text form of the options that change a result, or None if they cannot be keyed."""
+    if pages is None or isinstance(pages, (int, range, slice)):
+        pages_key = repr(pages)
+    elif isinstance(pages, (list, tuple)) and all(isinstance(item, (int, range, slice)) for item in pages):
+        pages_key = repr(tuple(pages))
+    else:
+        # Predicates and one-shot iterables have no stable identity
+        return None
+
+    if region_matcher is None:
+        matcher_key = "default"
+    elif isinstance(region_matcher, KeywordMatcher):
+        matcher_key = repr((region_matcher.region_names,
+                            region_matcher.regex.pattern if region_matcher.regex else None))
+    else:
+        return None
+    return f"pages={pages_key}\nregions={matcher_key}"
+
+class ResultCache:
+    """
+    SQLite-backed cache of extract_dimensions_from_pdf() results.
+    `max_bytes` caps the total size of the stored results; the least recently used are evicted past it.
+    The total is summed once when the cache is opened and kept up to date by this object's writes, so
+    writes from another process sharing the file are only counted once it is reopened.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        # WAL without a sync per commit keeps the access-time update of a hit cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest BLOB)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, result BLOB, bytes INTEGER, accessed REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS pages (key BLOB PRIMARY KEY, result BLOB, bytes INTEGER, accessed REAL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS pages_accessed ON pages (accessed)")
+        # Running size of both tables, so writes do not sum them again (see _store)
+        self.total_bytes = self.connection.execute(
+            "SELECT (SELECT COALESCE(SUM(bytes), 0) FROM results) + (SELECT COALESCE(SUM(bytes), 0) FROM pages)"
+        ).fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _digest(self, pdf_path):
+        """
+        Content hash of `pdf_path`, re-hashed only if its size or mtime changed since last seen.
+        In-memory sources (bytes, BytesIO, mmap, ...) are hashed every time.
+        """
+        if not is_path(pdf_path):
+            return hashlib.blake2b(source_buffer(pdf_path), digest_size=16).digest()
+        path = os.path.abspath(pdf_path)
+        stat = os.stat(path)
+        row = self.connection.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+
+        digest = file_digest(path)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest))
+        return digest
+
+    def key(self, pdf_path, pages=None, region_matcher=None):
+        """The cache key of a result, or None if the options cannot be cached (e.g. a page predicate)."""
+        options_key = _options_key(pages, region_matcher)
+        if options_key is None:
+            return None
+        key = hashlib.blake2b(self._digest(pdf_path), digest_size=16)
+        key.update(extraction_version().encode("utf-8"))
+        key.update(options_key.encode("utf-8"))
+        return key.digest()
+
+    def get(self, pdf_path, pages=None, region_matcher=None):
+        """Returns the cached result for this file and options, or None."""
+        key = self.key(pdf_path, pages, region_matcher)
+        if key is None:
+            return None
+        row = self.connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, pdf_path, result, pages=None, region_matcher=None):
+        """Stores a result, then evicts the least recently used results while over max_bytes."""
+        key = self.key(pdf_path, pages, region_matcher)
+        if key is None:
+            return
+        self._store("results", key, pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def page_key(self, doc, page_num, region_matcher=None, memo=None):
+        """The cache key of one page of an open document (see page_fingerprint), or None if it cannot be cached."""
+        options_key = _options_key(None, region_matcher)
+        if options_key is None:
+            return None
+        key = hashlib.blake2b(page_fingerprint(doc, page_num, memo), digest_size=16)
+        key.update(extraction_version().encode("utf-8"))
+        key.update(options_key.encode("utf-8"))
+        return key.digest()
+
+    def get_page(self, key, page_num):
+        """
+        Returns the cached raw extract_page() result stored under `key`, renumbered as page `page_num`,
+        or None. Values are not part of it: they depend on the whole document (see iter_with_values).
+        """
+        row = self.connection.execute("SELECT result FROM pages WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.connection.execute("UPDATE pages SET accessed = ? WHERE key = ?", (time.time(), key))
+        page_result = pickle.loads(row[0])
+        page_result["page"] = page_num
+        for dimension in page_result["dimensions"]:
+            dimension.page = page_num
+        return page_result
+
+    def put_page(self, key, page_result):
+        """Stores a raw extract_page() result (before values are assigned) under a page_key()."""
+        self._store("pages", key, pickle.dumps(page_result, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _store(self, table, key, blob):
+        """Writes a blob to `table` ("results" or "pages"), keeping total_bytes current, then evicts."""
+        row = self.connection.execute(f"SELECT bytes FROM {table} WHERE key = ?", (key,)).fetchone()
+        self.connection.execute(
+            f"INSERT OR REPLACE INTO {table} (key, result, bytes, accessed) VALUES (?, ?, ?, ?)",
+            (key, blob, len(blob), time.time()))
+        self.total_bytes += len(blob) - (row[0] if row else 0)
+        self._evict()
+
+    def _evict(self):
+        """Deletes the least recently used results and pages until the cache is within max_bytes."""
+        if self.total_bytes <= self.max_bytes:
+            return
+        total = self.total_bytes
+        stale_keys = {"results": [], "pages": []}
+        entries = self.connection.execute(
+            "SELECT 'results', key, bytes, accessed FROM results UNION ALL "
+            "SELECT 'pages', key, bytes, accessed FROM pages ORDER BY accessed")
+        for table, key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            stale_keys[table].append((key,))
+            total -= size
+        for table, keys in stale_keys.items():
+            self.connection.executemany(f"DELETE FROM {table} WHERE key = ?", keys)
+        self.total_bytes = total
+
+    def extract(self, pdf_path, pages=None, region_matcher=None, workers=1, chunk_size=None, low_memory=False,
+                engine="regex"):
+        """
+        extract_dimensions_from_pdf() through the cache: returns the cached result of an unchanged file,
+        otherwise extracts it with cached pages reused (only changed pages are extracted) and stores it.
+        The engine is not part of the key: every engine gives the same results.
+        """
+        result = self.get(pdf_path, pages, region_matcher)
+        if result is None:
+            result = collect_results(iter_pages(pdf_path, pages, region_matcher, workers, chunk_size, cache=self,
+                                                low_memory=low_memory, engine=engine))
+            self.put(pdf_path, result, pages, region_matcher)
+        return result
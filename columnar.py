@@ -0,0 +1,159 @@
+"""
+Columnar (NumPy) storage for dimension results at corpus scale.
+
+A DimensionTable keeps one parallel array per field instead of a Python object per
+dimension, with the line texts, types and document names dictionary-encoded. Tables
+concatenate cheaply across documents, convert to a pandas DataFrame without copying the
+numeric columns, and round-trip through an uncompressed .npz file that can be memory-mapped.
+"""
+import zipfile
+
+import numpy as np
+
+from extractor import extract_dimensions_from_pdf, is_path
+
+class DimensionTable:
+    """
+    Parallel arrays, one row per Dimension record:
+    - document, text_code: int32 indexes into `documents` and `texts`
+    - type_code: uint8 index into `types`
+    - page: int32, x0/y0/x1/y1: float32, value: float64 (NaN when unparsed), count: int32
+    """
+    COLUMNS = {
+        "document": np.int32, "page": np.int32,
+        "x0": np.float32, "y0": np.float32, "x1": np.float32, "y1": np.float32,
+        "value": np.float64, "type_code": np.uint8, "text_code": np.int32, "count": np.int32,
+    }
+    VOCABULARIES = ("documents", "types", "texts")
+
+    def __init__(self, columns, documents, types, texts):
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.documents = documents
+        self.types = types
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.page)
+
+    @classmethod
+    def empty(cls):
+        columns = {name: np.empty(0, dtype) for name, dtype in cls.COLUMNS.items()}
+        return cls(columns, np.empty(0, "U1"), np.empty(0, "U1"), np.empty(0, "U1"))
+
+    @classmethod
+    def from_records(cls, dimensions, document=""):
+        """Builds a table from Dimension records (e.g. result["dimensions"]) of one document."""
+        dimensions = list(dimensions)
+        if len(dimensions) == 0:
+            table = cls.empty()
+            table.documents = np.array([document])
+            return table
+
+        type_codes = {}
+        text_codes = {}
+        bboxes = np.array([dimension.bbox for dimension in dimensions], dtype=np.float32).reshape(-1, 4)
+        columns = {
+            "document": np.zeros(len(dimensions), np.int32),
+            "page": np.fromiter((dimension.page for dimension in dimensions), np.int32, len(dimensions)),
+            "x0": bboxes[:, 0].copy(), "y0": bboxes[:, 1].copy(),
+            "x1": bboxes[:, 2].copy(), "y1": bboxes[:, 3].copy(),
+            "value": np.fromiter(
+                (np.nan if dimension.value is None else dimension.value for dimension in dimensions),
+                np.float64, len(dimensions)),
+            "type_code": np.fromiter(
+                (type_codes.setdefault(dimension.dim_type, len(type_codes)) for dimension in dimensions),
+                np.uint8, len(dimensions)),
+            "text_code": np.fromiter(
+                (text_codes.setdefault(dimension.text, len(text_codes)) for dimension in dimensions),
+                np.int32, len(dimensions)),
+            "count": np.fromiter((dimension.count for dimension in dimensions), np.int32, len(dimensions)),
+        }
+        return cls(columns, np.array([document]), np.array(list(type_codes)), np.array(list(text_codes)))
+
+    @classmethod
+    def concat(cls, tables):
+        """
+        Concatenates tables (e.g. one per document) into one.
+        Vocabularies are merged with np.unique and the codes remapped with one gather per table.
+        """
+        tables = [table for table in tables if table is not None]
+        if not tables:
+            return cls.empty()
+
+        columns = {name: np.concatenate([getattr(table, name) for table in tables]) for name in cls.COLUMNS}
+        vocabularies = {}
+        for vocabulary, code_column in (("documents", "document"), ("types", "type_code"), ("texts", "text_code")):
+            merged, inverse = np.unique(
+                np.concatenate([getattr(table, vocabulary) for table in tables]), return_inverse=True)
+            remapped = []
+            offset = 0
+            for table in tables:
+                size = len(getattr(table, vocabulary))
+                remapped.append(inverse[offset:offset + size][getattr(table, code_column)])
+                offset += size
+            columns[code_column] = np.concatenate(remapped).astype(cls.COLUMNS[code_column], copy=False)
+            vocabularies[vocabulary] = merged
+        return cls(columns, **vocabularies)
+
+    def to_pandas(self):
+        """
+        Returns a pandas DataFrame backed by the table's arrays (pandas is only needed for this).
+        document/dim_type/text become categoricals over the vocabularies.
+        """
+        import pandas as pd
+
+        data = {name: getattr(self, name) for name in self.COLUMNS if not name.endswith("_code") and name != "document"}
+        data["document"] = pd.Categorical.from_codes(self.document, categories=self.documents)
+        data["dim_type"] = pd.Categorical.from_codes(self.type_code, categories=self.types)
+        data["text"] = pd.Categorical.from_codes(self.text_code, categories=self.texts)
+        return pd.DataFrame(data, copy=False)
+
+    def save(self, path):
+        """Writes the table as an uncompressed .npz, so load() can memory-map it."""
+        arrays = {name: getattr(self, name) for name in self.COLUMNS}
+        arrays.update({name: getattr(self, name) for name in self.VOCABULARIES})
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Reads a table written by save(); with mmap=True the arrays are read-only views of the file."""
+        arrays = _load_npz_mmap(path) if mmap else dict(np.load(path))
+        columns = {name: arrays[name] for name in cls.COLUMNS}
+        return cls(columns, *(arrays[name] for name in cls.VOCABULARIES))
+
+def _load_npz_mmap(path):
+    """
+    Memory-maps every array of an uncompressed .npz file.
+    np.load() ignores mmap_mode for .npz archives, so the member offsets are located by hand:
+    each stored member is a plain .npy file at a fixed offset inside the zip.
+    """
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as raw:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed and cannot be memory-mapped")
+
+            # Local file header: 30 fixed bytes, then the file name and extra field
+            raw.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(raw.read(4), "<u2")
+            raw.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+
+            version = np.lib.format.read_magic(raw)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw)
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if 0 in shape:
+                arrays[name] = np.empty(shape, dtype)
+            else:
+                arrays[name] = np.memmap(raw.name, dtype=dtype, mode="r", offset=raw.tell(),
+                                         shape=shape, order="F" if fortran_order else "C")
+    return arrays
+
+def extract_dimension_table(pdf_path, **options):
+    """extract_dimensions_from_pdf() returning a DimensionTable instead of record lists."""
+    results = extract_dimensions_from_pdf(pdf_path, **options)
+    # In-memory documents have no name
+    return DimensionTable.from_records(results["dimensions"], document=str(pdf_path) if is_path(pdf_path) else "")
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import filedialog, scrolledtext
-from extractor import extract_dimensions_from_pdf
+from extractor import collect_results, iter_pages
 import os # Import the os module
 
 # Global variable for the file name label
@@ -14,7 +14,14 @@ def select_file():
         file_name_label.config(text=f"Selected PDF: {display_file_name}")
 
         try:
-            dims = extract_dimensions_from_pdf(file_path)
+            # Consume pages as they finish so the window shows progress on large packages
+            page_results = []
+            for page_result in iter_pages(file_path):
+                page_results.append(page_result)
+                file_name_label.config(text=f"Selected PDF: {display_file_name} (page {page_result['page'] + 1} done)")
+                root.update_idletasks()
+            file_name_label.config(text=f"Selected PDF: {display_file_name}")
+            dims = collect_results(page_results)
             if not dims:
                 text_box.delete(1.0, tk.END)
                 text_box.insert(tk.END, "No dimensions found in this PDF.")
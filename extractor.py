@@ -1,28 +1,376 @@
-import fitz
+import argparse
+import functools
+import io
+import itertools
+import mmap
+import os
 import re
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz
+import numpy as np
+
+import patterns as pattern_registry
+import tokenizer
+from numeric import assign_values, detect_decimal_separator, sort_by_value
+from records import Dimension, dimension_lines
+
+# Local files at least this large are memory-mapped instead of being read through MuPDF's file I/O
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+def is_path(source):
+    """True if `source` names a file (str or os.PathLike) rather than holding the PDF in memory."""
+    return isinstance(source, (str, os.PathLike))
+
+def source_buffer(source):
+    """
+    Zero-copy buffer over an in-memory PDF source: bytes, bytearray, memoryview, io.BytesIO, mmap.mmap,
+    or an open binary file (which is memory-mapped).
+    """
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, io.BytesIO):
+        return source.getbuffer()
+    if hasattr(source, "fileno") and hasattr(source, "read") and not isinstance(source, mmap.mmap):
+        source = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(source)
+
+def open_document(source):
+    """
+    Opens a PDF from a path or an in-memory source (see source_buffer) without copying it.
+    Files of MMAP_THRESHOLD bytes or more are memory-mapped rather than read into memory.
+    """
+    if is_path(source):
+        if os.path.getsize(source) < MMAP_THRESHOLD:
+            return fitz.open(source)
+        with open(source, "rb") as pdf_file:
+            source = mmap.mmap(pdf_file.fileno(), 0, access=mmap.ACCESS_READ)
+    return fitz.open(stream=source_buffer(source), filetype="pdf")
+
+# Text extraction profile: get_text("dict")'s defaults without TEXT_PRESERVE_IMAGES, so raster images
+# (logos, scanned details) are neither decoded nor copied into the result. Ligatures, whitespace and
+# the mediabox clip are kept as they shape the line texts; the costlier optional features (styles,
+# vector collection, accurate bboxes, structure) are off by default and stay off.
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+def read_page_blocks(page, flags=TEXT_FLAGS, textpage=None):
+    """
+    Interprets the page content stream once and returns its text blocks (get_text("dict") blocks).
+    Each pass then builds only the lines of the page area it needs with page_lines().
+    A single unclipped textpage is used on purpose: MuPDF can only clip a textpage to one rectangle and
+    re-interprets the whole content stream for each clipped textpage, so clipping happens here instead.
+    Pass `textpage` to reuse one the caller keeps for keyword rects (see KeywordMatcher.find).
+    """
+    if textpage is None:
+        textpage = page.get_textpage(flags=flags)
+    # Image blocks only appear with TEXT_PRESERVE_IMAGES
+    return [block for block in page.get_text("dict", textpage=textpage)["blocks"] if block["type"] == 0]
+
+def _overlaps(a, b):
+    """fitz.Rect.intersects() on (x0, y0, x1, y1) tuples: both non-empty with a non-empty intersection."""
+    return (a[0] < a[2] and a[1] < a[3] and b[0] < b[2] and b[1] < b[3]
+            and a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3])
+
+def _contains(outer, inner):
+    return outer[0] <= inner[0] and outer[1] <= inner[1] and inner[2] <= outer[2] and inner[3] <= outer[3]
+
+# Up to this many zones a plain scan beats the grid lookup
+LINEAR_ZONE_LIMIT = 4
+
+class ZoneIndex:
+    """
+    Uniform-grid spatial index of named page zones (exclusion or inclusion regions: title block, revision
+    block, notes, BOM, hole tables, ...). Each zone is registered once in the grid cells it covers; a query
+    only tests the zones registered in the cells under the bbox, so the cost per line stays flat however
+    many zones a page has. Built once per page.
+    """
 
-def find_table_region(page, keywords, search_quadrant=None, padding=10):
+    def __init__(self, zones, cell_size=64):
+        # zones: (name, rect) pairs; rects may be fitz.Rect or (x0, y0, x1, y1), None and empty ones are skipped
+        self.zones = [(name, tuple(rect)) for name, rect in zones
+                      if rect is not None and rect[0] < rect[2] and rect[1] < rect[3]]
+        self.cell_size = cell_size
+        # float64, so comparisons against float32 line boxes are exact (see masks)
+        self.rects = np.array([rect for _, rect in self.zones], dtype=np.float64).reshape(-1, 4)
+        self.cells = {} # (column, row) -> indexes into self.zones
+        for index, (_, rect) in enumerate(self.zones):
+            for cell in self._cells(rect):
+                self.cells.setdefault(cell, []).append(index)
+
+    @classmethod
+    def from_rects(cls, rects, cell_size=64):
+        """Index of unnamed zones (named by their position in `rects`)."""
+        return cls(enumerate(rects), cell_size)
+
+    def __len__(self):
+        return len(self.zones)
+
+    def _cells(self, rect):
+        size = self.cell_size
+        for column in range(int(rect[0] // size), int(rect[2] // size) + 1):
+            for row in range(int(rect[1] // size), int(rect[3] // size) + 1):
+                yield column, row
+
+    def _candidates(self, bbox):
+        if len(self.zones) <= LINEAR_ZONE_LIMIT or len(self.cells) <= 1:
+            return range(len(self.zones))
+        found = set()
+        for cell in self._cells(bbox):
+            found.update(self.cells.get(cell, ()))
+        return sorted(found)
+
+    def masks(self, boxes):
+        """
+        Vectorized membership of many boxes at once: an (N, Z) bool array telling which of the Z zones each
+        of the N boxes in `boxes` (an (N, 4) array, see line_boxes) overlaps, as fitz.Rect.intersects would.
+        """
+        boxes = boxes[:, None, :]
+        rects = self.rects[None, :, :]
+        return ((boxes[..., 0] < boxes[..., 2]) & (boxes[..., 1] < boxes[..., 3])
+                & (boxes[..., 0] < rects[..., 2]) & (rects[..., 0] < boxes[..., 2])
+                & (boxes[..., 1] < rects[..., 3]) & (rects[..., 1] < boxes[..., 3]))
+
+    def mask(self, boxes):
+        """(N,) bool array: which boxes overlap at least one zone."""
+        return self.masks(boxes).any(axis=1)
+
+    def touching(self, bbox):
+        """Names of the zones `bbox` overlaps (see fitz.Rect.intersects), in zone order."""
+        return [self.zones[index][0] for index in self._candidates(bbox) if _overlaps(bbox, self.zones[index][1])]
+
+    def touches_any(self, bbox):
+        # A zone may be tested twice if it shares several cells with bbox, which is cheaper than de-duplicating
+        zones = self.zones
+        if len(zones) <= LINEAR_ZONE_LIMIT or len(self.cells) <= 1:
+            return any(_overlaps(bbox, rect) for _, rect in zones)
+        cells = self.cells
+        return any(_overlaps(bbox, zones[index][1])
+                   for cell in self._cells(bbox) for index in cells.get(cell, ()))
+
+    def within_any(self, bbox):
+        """True if one zone contains `bbox` entirely."""
+        if len(self.zones) <= LINEAR_ZONE_LIMIT:
+            return any(_contains(rect, bbox) for _, rect in self.zones)
+        # Any zone containing bbox is registered in the cell of its top-left corner
+        size = self.cell_size
+        cell = (int(bbox[0] // size), int(bbox[1] // size))
+        return any(_contains(self.zones[index][1], bbox) for index in self.cells.get(cell, ()))
+
+def page_lines(blocks, clip=None, exclude=None):
+    """
+    Builds the non-empty lines of `blocks` (see read_page_blocks) that touch one of the `clip` zones
+    (inclusion zones, default: no clipping) and none of the `exclude` zones. Both may be ZoneIndex
+    objects or lists of rects.
+    Each line is a dict with the stripped 'text', its 'bbox' and its 'spans' as (text, bbox) pairs.
+    Whole blocks are tested first, so lines are only tested one by one in blocks straddling a boundary,
+    and lines outside the area are never built.
+    """
+    if clip is not None and not isinstance(clip, ZoneIndex):
+        clip = ZoneIndex.from_rects(clip)
+    if exclude is not None and not isinstance(exclude, ZoneIndex):
+        exclude = ZoneIndex.from_rects(exclude)
+
+    lines = []
+    for block in blocks:
+        block_bbox = block["bbox"]
+        test_clip = False
+        if clip is not None:
+            if not clip.touches_any(block_bbox):
+                continue
+            test_clip = not clip.within_any(block_bbox)
+        test_exclude = exclude is not None and exclude.touches_any(block_bbox)
+
+        for line in block["lines"]:
+            line_text = "".join(span["text"] for span in line["spans"]).strip()
+            if not line_text:
+                continue
+            line_bbox = line["bbox"] # Union of the span bboxes
+            if test_clip and not clip.touches_any(line_bbox):
+                continue
+            if test_exclude and exclude.touches_any(line_bbox):
+                continue
+
+            spans = [(span["text"], fitz.Rect(span["bbox"])) for span in line["spans"]]
+            lines.append({"text": line_text, "bbox": fitz.Rect(line_bbox), "spans": spans})
+    return lines
+
+def line_boxes(blocks):
+    """
+    Flattens the lines of `blocks` (see read_page_blocks) into a list of MuPDF line dicts and an (N, 4)
+    float32 array of their bboxes, for region masks over the whole page at once (see ZoneIndex.masks).
+    MuPDF coordinates are C floats, so float32 holds them exactly.
+    """
+    raw_lines = [line for block in blocks for line in block["lines"]]
+    boxes = np.array([line["bbox"] for line in raw_lines], dtype=np.float32).reshape(-1, 4)
+    return raw_lines, boxes
+
+def read_page_lines(page, flags=TEXT_FLAGS):
+    """
+    Parses the page text once and returns all its non-empty lines (see page_lines).
+    Keyword region detection, dimension matching and title-block parsing all work on these lines,
+    so the page content stream is only interpreted a single time.
+    """
+    return page_lines(read_page_blocks(page, flags))
+
+def _trie_pattern(words):
+    """
+    Folds `words` into a trie-shaped regex source, e.g. ["SCALE", "SHEET"] -> "S(?:CALE|HEET)".
+    Every alternation in the result starts with a distinct character, so the regex engine tries at most
+    one branch per character no matter how many words there are.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word.upper():
+            node = node.setdefault(char, {})
+        node[""] = {} # End-of-word marker
+
+    def node_pattern(node):
+        branches = [re.escape(char) + node_pattern(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A shorter word ends here; the longer continuation is optional (greedy, so it is preferred)
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+
+    return node_pattern(trie)
+
+class KeywordMatcher:
+    """
+    Finds the keywords of several regions in a single pass over the page lines.
+    Built once per keyword set: each region's keywords become one trie-shaped regex, so the cost per
+    line stays flat as the vocabularies grow. All of them are also folded into one alternation that
+    skips the lines holding no keyword at all, so only those few lines are searched region by region.
+    Matching is case-insensitive like page.search_for. Regions are matched independently, so a keyword
+    that starts with another region's keyword ("REVISIONS" vs "REV") is found for both; hits of one
+    region do not overlap.
+    """
+
+    def __init__(self, regions):
+        # regions: mapping of region name -> list of keywords
+        self.region_names = list(regions)
+        groups = []
+        self.region_regexes = [] # (region index, compiled trie of its keywords)
+        for index, name in enumerate(self.region_names):
+            keywords = [keyword for keyword in regions[name] if keyword]
+            if keywords:
+                groups.append(f"(?P<r{index}>{_trie_pattern(keywords)})")
+                self.region_regexes.append((index, re.compile(_trie_pattern(keywords), re.IGNORECASE)))
+        self.regex = re.compile("|".join(groups), re.IGNORECASE) if groups else None
+
+    def find(self, lines, textpage=None):
+        """
+        Returns {region name: [fitz.Rect, ...]} with one rect per keyword hit in `lines`.
+        With the page's `textpage` the rect is the keyword's own bbox, as page.search_for returns it;
+        without one it is the bbox of the span holding the hit (or of the line if the hit crosses
+        spans), which can reach far beyond the keyword.
+        """
+        hits = {name: [] for name in self.region_names}
+        if self.regex is None:
+            return hits
+
+        # Keyword text -> its page.search_for rects, searched once per page on the shared textpage
+        searched = {}
+        for line in lines:
+            if not self.regex.search(line["text"]):
+                continue
+            matches = [(index, match) for index, region_regex in self.region_regexes
+                       for match in region_regex.finditer(line["text"])]
+
+            # Span boundaries as offsets into the stripped line text
+            raw_text = "".join(text for text, _ in line["spans"])
+            offset = -(len(raw_text) - len(raw_text.lstrip()))
+            span_ranges = []
+            for text, span_bbox in line["spans"]:
+                span_ranges.append((offset, offset + len(text), span_bbox))
+                offset += len(text)
+
+            # Occurrences of each keyword text seen so far on this line
+            occurrences = {}
+            for index, match in matches:
+                start, end = match.span()
+                rect = None
+                if textpage is not None:
+                    keyword = match.group(0).upper()
+                    if keyword not in searched:
+                        searched[keyword] = textpage.search(keyword, quads=False)
+                    # The search hits on this line, left to right; the n-th hit of the line gets the n-th one
+                    line_rects = sorted((hit for hit in searched[keyword] if _centered_in(hit, line["bbox"])),
+                                        key=lambda hit: hit.x0)
+                    occurrence = occurrences[keyword] = occurrences.get(keyword, -1) + 1
+                    if occurrence < len(line_rects):
+                        rect = line_rects[occurrence]
+                if rect is None:
+                    rect = line["bbox"]
+                    for span_start, span_end, span_bbox in span_ranges:
+                        if span_start <= start and end <= span_end:
+                            rect = span_bbox
+                            break
+                hits[self.region_names[index]].append(rect)
+        return hits
+
+def _centered_in(rect, bbox):
+    """True if the center of `rect` lies inside `bbox` (a search hit belongs to the line it sits on)."""
+    x = (rect.x0 + rect.x1) / 2
+    y = (rect.y0 + rect.y1) / 2
+    return bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]
+
+@functools.lru_cache(maxsize=32)
+def _keyword_matcher(keywords):
+    return KeywordMatcher({"keywords": keywords})
+
+# --- Keyword vocabularies for the regions excluded from the dimension pass ---
+# Extend these lists (or build your own KeywordMatcher) to support other title-block vocabularies.
+# A matcher may define more regions than these two (revision block, notes, BOM, hole tables...):
+# every region found on a page is excluded from the dimension pass.
+TITLE_BLOCK_KEYWORDS = ["PRT-", "DRAWN BY", "APPROVED BY", "SCALE", "SHEET", "REV", "DWG NO."]
+MATERIAL_TABLE_KEYWORDS = ["MATERIAL", "FINISH", "EXTENSION", "TRAITEMENT DE SURFACE", "TREATMENT"]
+
+REGION_MATCHER = KeywordMatcher({
+    "title_block": TITLE_BLOCK_KEYWORDS,
+    "material_table": MATERIAL_TABLE_KEYWORDS,
+})
+
+# Quadrant each built-in region is searched in; other regions are searched on the whole page
+REGION_QUADRANTS = {"title_block": "bottom_right", "material_table": "bottom_left"}
+
+def find_table_region(lines, page_rect, keywords, search_quadrant=None, padding=10, textpage=None):
     """
     Dynamically finds a table region based on keywords within a specified quadrant.
+    `lines` is the output of read_page_lines() for the page whose bounds are `page_rect`; pass the
+    page's `textpage` for keyword-exact rects (see KeywordMatcher.find).
     Returns a fitz.Rect or None if not found.
     """
+    keyword_rects = _keyword_matcher(tuple(keywords)).find(lines, textpage)["keywords"]
+    return table_region_from_rects(keyword_rects, page_rect, search_quadrant, padding)
+
+def quadrant_rect(page_rect, search_quadrant):
+    """The page area of a search quadrant ("bottom_right" or "bottom_left"), or None for the whole page."""
+    if search_quadrant == 'bottom_right':
+        return fitz.Rect(page_rect.width * 0.5, page_rect.height * 0.5, page_rect.width, page_rect.height)
+    if search_quadrant == 'bottom_left':
+        return fitz.Rect(0, page_rect.height * 0.5, page_rect.width * 0.5, page_rect.height)
+    return None
+
+def table_region_from_rects(keyword_rects, page_rect, search_quadrant=None, padding=10):
+    """
+    Builds a table region from the keyword hits of one region (see KeywordMatcher.find).
+    Returns a fitz.Rect or None if no hit lies in the quadrant.
+    """
     found_rects = []
-    page_width = page.rect.width
-    page_height = page.rect.height
+    page_width = page_rect.width
+    page_height = page_rect.height
 
     # Define a rough quadrant bbox for initial keyword search if specified
-    quadrant_bbox = None
-    if search_quadrant == 'bottom_right':
-        quadrant_bbox = fitz.Rect(page_width * 0.5, page_height * 0.5, page_width, page_height)
-    elif search_quadrant == 'bottom_left':
-        quadrant_bbox = fitz.Rect(0, page_height * 0.5, page_width * 0.5, page_height)
-
-    for keyword in keywords:
-        text_instances = page.search_for(keyword)
-        for inst in text_instances:
-            if quadrant_bbox and not inst.intersects(quadrant_bbox): # Filter by quadrant if specified
-                continue
-            found_rects.append(inst)
+    quadrant_bbox = quadrant_rect(page_rect, search_quadrant)
+
+    for inst in keyword_rects:
+        if quadrant_bbox and not inst.intersects(quadrant_bbox): # Filter by quadrant if specified
+            continue
+        found_rects.append(inst)
 
     if not found_rects:
         return None # Return None if no keywords found
@@ -40,124 +388,589 @@ def find_table_region(page, keywords, search_quadrant=None, padding=10):
 
     return union_rect
 
-def extract_dimensions_from_pdf(pdf_path):
-    doc = fitz.open(pdf_path)
-    
-    drawing_dimensions = []
+def detect_regions(lines, page_rect, region_matcher=None, textpage=None):
+    """
+    Finds the regions of a page (title block, material table and any other region of the matcher)
+    with one keyword pass for all of them. Returns {region name: fitz.Rect or None if not found}.
+    The title block falls back to the standard bottom-right area; other regions that are not found
+    are simply not excluded. With the page's `textpage` the regions are built from the keywords' own
+    rects, as page.search_for finds them (see KeywordMatcher.find). Only the lines touching the
+    region_search_rects() of the page matter.
+    """
+    return regions_from_hits((region_matcher or REGION_MATCHER).find(lines, textpage), page_rect)
+
+def region_search_rects(page_rect, region_matcher=None):
+    """
+    The page areas detect_regions() takes keyword hits from: each region's quadrant (see REGION_QUADRANTS),
+    or None (the whole page) if a region of the matcher has none. Building only the lines touching them
+    gives the same regions as the whole page for a fraction of the keyword search.
+    """
+    rects = [quadrant_rect(page_rect, REGION_QUADRANTS.get(name))
+             for name in (region_matcher or REGION_MATCHER).region_names]
+    return None if None in rects else rects
+
+def regions_from_hits(keyword_hits, page_rect):
+    """detect_regions() from the keyword hits of a page (see KeywordMatcher.find)."""
+    regions = {
+        name: table_region_from_rects(rects, page_rect, REGION_QUADRANTS.get(name))
+        for name, rects in keyword_hits.items()
+    }
+    if not regions.get("title_block"):
+        # Fallback if keywords not found: standard bottom-right area
+        regions["title_block"] = fitz.Rect(page_rect.width * 0.60, page_rect.height * 0.75,
+                                           page_rect.width * 0.95, page_rect.height * 0.95)
+    return regions
+
+# Set a reasonable max length for linear numeric values to filter noise (adjustable parameter).
+# Applies to the token of every dimension type: a longer token is a garbled text layer, not a dimension.
+MAX_LINEAR_NUMERIC_LENGTH = 15
+# Lines longer than this are prose or garbled text, not callouts, and never reach the regexes.
+# `re` has no step limit, so this cap (with the linear-time patterns, see `python benchmark.py adversarial`)
+# is what bounds the regex work per line.
+MAX_LINE_LENGTH = 256
+
+# The decimal separator of a document is decided from the comma tokens of its first pages
+SEPARATOR_SAMPLE_PAGES = 5
+
+# Bump when a change alters extraction results, so persistent caches (see cache.py) drop old entries
+EXTRACTOR_VERSION = 9
+
+# Line classification engines, all giving the same results: "regex" matches each line on its own,
+# "bulk" scans a page's joined lines for each pattern first (see LineClassifier.classify_many) and
+# "tokenizer" reads the dimension off a single hand-written pass over the line (see tokenizer.py; it
+# falls back to "regex" once patterns are registered)
+ENGINES = ("regex", "bulk", "tokenizer")
+
+def extract_page(page, page_num, region_matcher=None, engine="regex"):
+    """
+    Extracts one page. Returns a dict with the 0-based "page" index, its "dimensions" (Dimension
+    records without values, see iter_pages) and the "part_numbers" and "general_tolerances" found
+    in its title block, each de-duplicated within the page only.
+    "stats" counts the page's "lines", those in the drawing area ("drawing_lines"), those of them
+    rejected by the digit prefilter without running a regex ("prefilter_rejected") and those
+    dropped for exceeding MAX_LINE_LENGTH or MAX_LINEAR_NUMERIC_LENGTH ("length_rejected").
+    `engine` is one of ENGINES.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine!r}")
+
+    # The matcher must provide "title_block" and "material_table" regions
+    region_matcher = region_matcher or REGION_MATCHER
+
+    # Compiled once at import and shared by every page and document (see patterns.py)
+    classifier = pattern_registry.get_classifier()
+    part_number_pattern = pattern_registry.PART_NUMBER_PATTERN
+    tolerance_pattern = pattern_registry.TOLERANCE_PATTERN
+
     part_numbers = []
     general_tolerances = []
 
-    # Set a reasonable max length for linear numeric values to filter noise (adjustable parameter)
-    MAX_LINEAR_NUMERIC_LENGTH = 15
-
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        page_width = page.rect.width
-        page_height = page.rect.height
-
-        # Dynamically find Title Block and Material Table regions
-        title_block_keywords = ["PRT-", "DRAWN BY", "APPROVED BY", "SCALE", "SHEET", "REV", "DWG NO."]
-
-        title_block_bbox = find_table_region(page, title_block_keywords, 'bottom_right')
-        if not title_block_bbox:
-            # Fallback if keywords not found: standard bottom-right area
-            title_block_bbox = fitz.Rect(page_width * 0.60, page_height * 0.75, page_width * 0.95, page_height * 0.95)
-
-        # Material/Finish Table (bottom-left)
-        material_table_keywords = ["MATERIAL", "FINISH", "EXTENSION", "TRAITEMENT DE SURFACE", "TREATMENT"]
-        material_table_bbox = find_table_region(page, material_table_keywords, 'bottom_left')
-        # Note: If material_table_bbox is None, it means the table wasn't found, which is fine; it won't be excluded.
-
-        # --- Regex Patterns for specific dimension types (ordered by specificity) ---
-        patterns = [
-            # 1. Diameter (e.g., Ø.201, ⌀.201, 8X Ø.201, 8X⌀.201, 02.13, O2.13)
-            # This regex looks for:
-            # - Optional multiplier (e.g., "8X", "8 X")
-            # - Diameter symbol (Ø or ⌀) OR common OCR misinterpretations like '0' or 'O'
-            # - Optional whitespace after the symbol/character
-            # - The numeric value (decimal or fraction)
-            # - Optional units (e.g., ", 'in", "mm", "cm")
-            (re.compile(r'(\d*\s*[Xx])?[\s]*[Ø⌀0O][\s]*([0-9]+[.,]?[0-9]*|[0-9]+/[0-9]+)(?:["\'in]*|mm|cm)?', re.IGNORECASE), "Diameter"),
-            # 2. Radius (e.g., R2.250, R17/32) - prioritize fraction over decimal
-            (re.compile(r'R\s*([0-9]+/[0-9]+|[0-9]+[.,]?[0-9]*)(?:["\'in]*|mm|cm)?', re.IGNORECASE), "Radius"),
-            # 3. Angles (e.g., 60°, 100°)
-            (re.compile(r'([0-9]+[.,]?[0-9]*)\s*°', re.IGNORECASE), "Angle"),
-            # 4. Thread/Bolt Callouts (e.g., 10-32 UNF)
-            (re.compile(r'([0-9]+-[0-9]+(?:\s*[A-Z]{2,4})?)', re.IGNORECASE), "Thread"),
-            # 5. Linear Fractions (e.g., 3/16, 1/2)
-            (re.compile(r'([0-9]+/[0-9]+)(?:["\'in]*|mm|cm)?', re.IGNORECASE), "Fraction"),
-            # 6. Basic Linear Dimensions (e.g., 4.50, 1,500, .750, 8.89, 10,06) - broad, so last
-            (re.compile(r'(?<![A-Za-z0-9])([0-9]*[.,][0-9]+|[0-9]+)(?:["\'in]*|mm|cm)?(?![A-Za-z0-9])', re.IGNORECASE), "Linear"),
+    # Interpret the page content once; each pass below builds only the lines of its own area, and the
+    # keyword search reuses the same textpage for the keywords' rects
+    textpage = page.get_textpage(flags=TEXT_FLAGS)
+    blocks = read_page_blocks(page, textpage=textpage)
+
+    # Dynamically find the Title Block, Material Table and other regions from the lines of their quadrants
+    region_lines = page_lines(blocks, clip=region_search_rects(page.rect, region_matcher))
+    regions = detect_regions(region_lines, page.rect, region_matcher, textpage)
+
+    # Region membership of every line in one shot: the drawing area is the page minus every region
+    # found (title block, material table, ...); the title-block pass only reads the title block
+    raw_lines, boxes = line_boxes(blocks)
+    zones = ZoneIndex(regions.items())
+    zone_masks = zones.masks(boxes)
+    in_drawing_area = ~zone_masks.any(axis=1)
+    in_title_block = zone_masks[:, [name for name, _ in zones.zones].index("title_block")]
+
+    # Distinct candidate lines of the drawing area in reading order, as text -> [bbox of the first
+    # occurrence, occurrences], so repeated lines are classified once
+    candidates = {}
+    drawing_lines = 0
+    prefilter_rejected = 0
+    length_rejected = 0
+
+    # Only process drawing area for drawing dimensions
+    for index in np.flatnonzero(in_drawing_area).tolist():
+        line = raw_lines[index]
+        line_text = "".join(span["text"] for span in line["spans"]).strip()
+        if not line_text:
+            continue
+        drawing_lines += 1
+        if line_text in candidates:
+            candidates[line_text][1] += 1
+            continue
+        if len(line_text) > MAX_LINE_LENGTH:
+            length_rejected += 1
+            continue
+        # Notes, view labels and the like hold no digit: skip the regexes for them
+        if not classifier.may_match(line_text):
+            prefilter_rejected += 1
+            continue
+        candidates[line_text] = [line["bbox"], 1]
+
+    # The first pattern (by priority) that matches classifies the line, as (dim_type, token) or None
+    texts = list(candidates)
+    if engine == "tokenizer" and classifier.default:
+        classified = [tokenizer.classify(text) for text in texts]
+    else:
+        if engine == "bulk":
+            matches = classifier.classify_many(texts)
+        else:
+            matches = [classifier.match(text) for text in texts]
+        classified = [found and _match_token(*found) for found in matches]
+
+    # Dimension records of this page, one per distinct line text
+    page_dimensions = []
+    for line_text, found in zip(texts, classified):
+        if found is None:
+            continue
+        # If any pattern matches, consider the entire line as a relevant dimension line
+        dim_type, token = found
+        token = _value_token(line_text, dim_type, token)
+        bbox, occurrences = candidates[line_text]
+        if token and len(token) > MAX_LINEAR_NUMERIC_LENGTH:
+            length_rejected += occurrences
+            continue
+        # The value is filled in per document (see iter_pages)
+        page_dimensions.append(Dimension(line_text, dim_type, token, None, page_num, bbox, occurrences))
+
+    # --- Extract Part Number and General Tolerances (only from Title Block Area) ---
+    for index in np.flatnonzero(in_title_block).tolist():
+        line_text = "".join(span["text"] for span in raw_lines[index]["spans"]).strip()
+        if len(line_text) > MAX_LINE_LENGTH:
+            continue
+        pn_match = part_number_pattern.search(line_text)
+        if pn_match and pn_match.group(0) not in [pn['value'] for pn in part_numbers]:
+            part_numbers.append({
+                'type': 'Part Number',
+                'value': pn_match.group(0)
+            })
+
+        for tol_match in tolerance_pattern.finditer(line_text):
+            tol_value = tol_match.group(0).strip()
+            if tol_value not in [gt['value'] for gt in general_tolerances]:
+                general_tolerances.append({
+                    'type': 'General Tolerance',
+                    'value': tol_value
+                })
+
+    return {
+        "page": page_num,
+        "dimensions": page_dimensions,
+        "part_numbers": part_numbers,
+        "general_tolerances": general_tolerances,
+        "stats": {"lines": len(raw_lines), "drawing_lines": drawing_lines, "prefilter_rejected": prefilter_rejected,
+                  "length_rejected": length_rejected},
+    }
+
+def _match_token(entry, match):
+    """(dim_type, token) of a registry match; by convention the last group of a pattern holds its numeric value."""
+    compiled_pattern, dim_type = entry
+    return dim_type, match.group(compiled_pattern.groups) if compiled_pattern.groups else match.group(0)
+
+def _value_token(line_text, dim_type, token):
+    """
+    The token a classified line is valued from: the pattern's token, except for diameters, which are
+    valued from the number after their Ø, ⌀ or OCR'd '0'/'O' symbol, or from the whole number when the
+    pattern took a '0' inside it for the symbol (None if there is none; see DIAMETER_VALUE_PATTERN).
+
+    >>> _value_token("2X ⌀.500 THRU", "Diameter", "0")
+    '.500'
+    >>> _value_token("1.005", "Diameter", "05"), _value_token("100", "Diameter", "0")
+    ('1.005', '100')
+    >>> doc = fitz.open(); page = doc.new_page()
+    >>> for index, text in enumerate(["Ø.201", "1.005", "100"]):
+    ...     _ = page.insert_text((72, 72 + 20 * index), text)
+    >>> [dimension.value for dimension in extract_dimensions_from_pdf(doc.tobytes())["dimensions"]]
+    [0.201, 1.005, 100.0]
+    """
+    if dim_type != "Diameter":
+        return token
+    for symbol_pattern in (pattern_registry.DIAMETER_VALUE_PATTERN, pattern_registry.OCR_DIAMETER_VALUE_PATTERN):
+        symbol_match = symbol_pattern.search(line_text)
+        if symbol_match:
+            return symbol_match.group(1)
+    for number_match in pattern_registry.NUMBER_PATTERN.finditer(line_text):
+        if pattern_registry.EMBEDDED_ZERO_PATTERN.search(number_match.group(0)):
+            return number_match.group(0)
+    return None
+
+def select_pages(doc, pages=None):
+    """
+    Resolves a page selection to the sorted 0-based indices of the selected pages, without loading them.
+    `pages` may be None (all pages), an int, a range or slice, an iterable mixing those, or a predicate
+    called with {"number", "label", "rect"} (0-based index, page label, cropbox) for each page.
+    Negative ints count from the end, like list indexing.
+    """
+    page_count = len(doc)
+    if pages is None:
+        return list(range(page_count))
+
+    if callable(pages):
+        label_rules = sorted(doc.get_page_labels(), key=lambda rule: rule["startpage"])
+        return [
+            page_num for page_num in range(page_count)
+            if pages({
+                "number": page_num,
+                "label": _page_label(page_num, label_rules),
+                "rect": doc.page_cropbox(page_num),
+            })
         ]
 
-        # --- Patterns for Part Number and General Tolerances in Title Block ---
-        part_number_pattern = re.compile(r'(PRT-[0-9]{3}-[0-9]{4}-[0-9]{2})', re.IGNORECASE)
-        tolerance_pattern = re.compile(r'[\+\-±][\s]*([0-9]+[.,]?[0-9]*|[0-9]+/[0-9]+)(?:["\'in]*|mm|cm)?', re.IGNORECASE)
-
-        blocks = page.get_text("dict")["blocks"]
-        for block in blocks:
-            # Process text line by line within each block
-            if "lines" in block:
-                for line in block["lines"]:
-                    line_text = "".join(span["text"] for span in line["spans"]).strip()
-                    if not line_text:
-                        continue
-
-                    # Determine if this line's bounding box is within the title block or material table
-                    line_bbox = fitz.Rect()
-                    for span in line["spans"]:
-                        line_bbox |= fitz.Rect(span["bbox"])
-
-                    is_in_title_block = line_bbox.intersects(title_block_bbox)
-                    is_in_material_table = material_table_bbox and line_bbox.intersects(material_table_bbox)
-
-                    # Only process drawing area for drawing dimensions
-                    temp_line_dimensions = []
-                    if not is_in_title_block and not is_in_material_table:
-                        for compiled_pattern, dim_type in patterns:
-                            if compiled_pattern.search(line_text):
-                                # If any pattern matches, consider the entire line as a relevant dimension line
-                                temp_line_dimensions.append(line_text)
-                                break # Move to the next pattern once a measurement is found on this line
-                    
-                    # Add the identified measurement lines to the global list
-                    drawing_dimensions.extend(temp_line_dimensions)
-
-                # --- Extract Part Number and General Tolerances (only from Title Block Area) ---
-            elif is_in_title_block:
-                    pn_match = part_number_pattern.search(line_text)
-                    if pn_match and pn_match.group(0) not in [pn['value'] for pn in part_numbers]:
-                        part_numbers.append({
-                            'type': 'Part Number',
-                                'value': pn_match.group(0)
-                            })
-                    
-                    for tol_match in tolerance_pattern.finditer(line_text):
-                        tol_value = tol_match.group(0).strip()
-                        if tol_value not in [gt['value'] for gt in general_tolerances]:
-                            general_tolerances.append({
-                                'type': 'General Tolerance',
-                                'value': tol_value
-                            })
-
-    # Final de-duplication of unique lines for drawing dimensions
-    unique_drawing_dimensions = sorted(list(set(drawing_dimensions)))
+    if isinstance(pages, (int, range, slice)):
+        pages = [pages]
+
+    selected = set()
+    for item in pages:
+        if isinstance(item, slice):
+            selected.update(range(page_count)[item])
+        elif isinstance(item, range):
+            selected.update(page_num for page_num in item if 0 <= page_num < page_count)
+        else:
+            page_num = int(item)
+            if not -page_count <= page_num < page_count:
+                raise ValueError(f"Page {page_num} out of range for a {page_count}-page document")
+            selected.add(page_num % page_count)
+    return sorted(selected)
+
+def _page_label(page_num, label_rules):
+    """
+    Page.get_label() without loading the page, from the doc.get_page_labels() rules sorted by start page
+    ("" for a page no rule covers).
+
+    >>> doc = fitz.open(); _ = [doc.new_page() for _ in range(5)]
+    >>> doc.set_page_labels([{"startpage": 0, "prefix": "S-", "style": "D", "firstpagenum": 1},
+    ...                      {"startpage": 3, "prefix": "", "style": "a", "firstpagenum": 1}])
+    >>> select_pages(doc, lambda page: page["label"].startswith("S-"))
+    [0, 1, 2]
+    >>> [_page_label(page_num, doc.get_page_labels()) for page_num in range(5)] == [page.get_label() for page in doc]
+    True
+    """
+    rules = [rule for rule in label_rules if rule["startpage"] <= page_num]
+    if not rules:
+        return ""
+    rule = rules[-1]
+    style = rule.get("style", "")
+    # Letter styles count from "a" = 0
+    offset = -1 if style in ("a", "A") else 0
+    number = page_num - rule["startpage"] + rule.get("firstpagenum", 1) + offset
+    return fitz.utils.construct_label(style, rule.get("prefix", ""), number)
+
+def parse_page_spec(spec):
+    """
+    Parses a command-line page spec of 1-based sheet numbers, e.g. "1", "1,3-5", "8-" (8 to the end)
+    or "-3" (up to 3), into a selection for select_pages().
+    Sheet numbers below 1, inverted ranges ("5-3") and non-numbers raise argparse.ArgumentTypeError, so
+    --pages reports them as a usage error instead of selecting other sheets (0 would be the last one).
+    """
+    selection = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, dash, last = part.partition("-")
+        try:
+            first = int(first) if first else None
+            last = int(last) if last else None
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid page range: {part!r}") from None
+        if (first is not None and first < 1) or (last is not None and last < 1):
+            raise argparse.ArgumentTypeError(f"sheet numbers start at 1: {part!r}")
+        if not dash:
+            selection.append(first - 1)
+        else:
+            if first is not None and last is not None and last < first:
+                raise argparse.ArgumentTypeError(f"inverted page range: {part!r}")
+            selection.append(slice(first - 1 if first is not None else None, last))
+    return selection
+
+def iter_pages(pdf_path, pages=None, region_matcher=None, workers=1, chunk_size=None, cache=None, low_memory=False,
+               engine="regex"):
+    """
+    Yields the extract_page() result of each page as soon as it is done, with Dimension.value filled in.
+    `pages` restricts the run to a selection (see select_pages); other pages are never loaded.
+    With workers > 1 (0 means one per CPU) the pages are split into chunks of `chunk_size` pages and
+    extracted by a process pool; results still come back in page order and match the serial run.
+    Values need the document's decimal separator, which is decided from the comma tokens of the first
+    SEPARATOR_SAMPLE_PAGES pages; only those first pages are held back until the decision is made.
+    Each result also carries the "decimal_separator" used.
+    `pdf_path` may also be a PDF held in memory (bytes, memoryview, io.BytesIO, mmap; see open_document);
+    such documents are always extracted in this process, as workers can only reopen files by path.
+    With a `cache` (a cache.ResultCache), pages whose content is unchanged since they were last extracted are
+    taken from it and only the other pages are extracted.
+    The document is closed when the stream is exhausted or closed. With low_memory=True, MuPDF's store
+    (its cache of fonts, images and parsed objects) is emptied after every page, see release_memory().
+    `engine` picks the line classification engine (see ENGINES); it does not change the results.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine!r}")
+    workers = workers or os.cpu_count()
+    if not is_path(pdf_path):
+        workers = 1
+    if cache is not None:
+        raw_pages = _iter_pages_cached(pdf_path, pages, region_matcher, workers, chunk_size, cache, low_memory, engine)
+    elif workers > 1:
+        raw_pages = _iter_pages_parallel(pdf_path, pages, region_matcher, workers, chunk_size, low_memory, engine)
+    else:
+        raw_pages = _iter_pages_serial(pdf_path, pages, region_matcher, low_memory, engine)
+    return iter_with_values(raw_pages)
+
+def release_memory():
+    """Empties MuPDF's store. PyMuPDF cannot cap the store size (TOOLS.store_maxsize is read-only), so it is shrunk instead."""
+    fitz.TOOLS.store_shrink(100)
+
+def _iter_pages_serial(pdf_path, pages, region_matcher, low_memory=False, engine="regex"):
+    with open_document(pdf_path) as doc:
+        for page_num in select_pages(doc, pages):
+            page_result = extract_page(doc[page_num], page_num, region_matcher, engine)
+            if low_memory:
+                release_memory()
+            yield page_result
+
+def _iter_pages_cached(pdf_path, pages, region_matcher, workers, chunk_size, cache, low_memory, engine):
+    with open_document(pdf_path) as doc:
+        page_nums = select_pages(doc, pages)
+        memo = {} # Shared resources (fonts, forms) are hashed once per document
+        keys = {page_num: cache.page_key(doc, page_num, region_matcher, memo) for page_num in page_nums}
+    cached = {page_num: cache.get_page(key, page_num) for page_num, key in keys.items() if key is not None}
+    missing = [page_num for page_num in page_nums if cached.get(page_num) is None]
+
+    if workers > 1 and len(missing) > 1:
+        fresh_pages = _iter_pages_parallel(pdf_path, missing, region_matcher, workers, chunk_size, low_memory, engine)
+    else:
+        fresh_pages = _iter_pages_serial(pdf_path, missing, region_matcher, low_memory, engine)
+    for page_num in page_nums:
+        page_result = cached.get(page_num)
+        if page_result is None:
+            page_result = next(fresh_pages)
+            if keys[page_num] is not None:
+                cache.put_page(keys[page_num], page_result)
+        yield page_result
+
+def extract_page_chunk(pdf_path, page_nums, region_matcher=None, dimension_patterns=None, low_memory=False,
+                       engine="regex"):
+    """
+    Process-pool task: extracts a chunk of pages with a document opened by this worker.
+    Returns the raw extract_page() results; run them through iter_with_values() in page order.
+    """
+    # Mirror the parent's registry (registered patterns do not survive a spawn-started worker)
+    if dimension_patterns is not None:
+        pattern_registry.set_dimension_patterns(dimension_patterns)
+    page_results = []
+    with open_document(pdf_path) as doc:
+        for page_num in page_nums:
+            page_results.append(extract_page(doc[page_num], page_num, region_matcher, engine))
+            if low_memory:
+                release_memory()
+    return page_results
+
+def _iter_pages_parallel(pdf_path, pages, region_matcher, workers, chunk_size, low_memory=False, engine="regex"):
+    # PyMuPDF documents cannot be shared across processes: only page numbers go to the workers
+    with open_document(pdf_path) as doc:
+        page_nums = select_pages(doc, pages)
+    if not page_nums:
+        return
+
+    if not chunk_size:
+        # About four chunks per worker, so a slow chunk does not leave the other workers idle
+        chunk_size = max(1, -(-len(page_nums) // (workers * 4)))
+    chunks = [page_nums[start:start + chunk_size] for start in range(0, len(page_nums), chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        # map() returns the chunks in submission (page) order
+        for chunk_results in executor.map(
+            extract_page_chunk, itertools.repeat(pdf_path), chunks,
+            itertools.repeat(region_matcher), itertools.repeat(pattern_registry.get_dimension_patterns()),
+            itertools.repeat(low_memory), itertools.repeat(engine),
+        ):
+            yield from chunk_results
+
+def iter_with_values(raw_pages):
+    """Fills in Dimension.value for a stream of raw extract_page() results of one document, in page order."""
+    pending = [] # Pages waiting for the separator decision
+    decimal_separator = None
+    for page_result in raw_pages:
+        if decimal_separator is None:
+            pending.append(page_result)
+            if len(pending) < SEPARATOR_SAMPLE_PAGES:
+                continue
+            decimal_separator = _decide_separator(pending)
+            yield from _with_values(pending, decimal_separator)
+            pending = []
+        else:
+            yield from _with_values([page_result], decimal_separator)
+
+    if pending:
+        yield from _with_values(pending, _decide_separator(pending))
+
+def _decide_separator(page_results):
+    return detect_decimal_separator(
+        dimension.token for page_result in page_results for dimension in page_result["dimensions"]
+    )
+
+def _with_values(page_results, decimal_separator):
+    for page_result in page_results:
+        assign_values(page_result["dimensions"], decimal_separator)
+        page_result["decimal_separator"] = decimal_separator
+        yield page_result
+
+def iter_dimensions(pdf_path, pages=None, region_matcher=None, workers=1, chunk_size=None, low_memory=False,
+                    engine="regex"):
+    """Yields Dimension records page by page, as each page finishes (see iter_pages)."""
+    for page_result in iter_pages(pdf_path, pages, region_matcher, workers, chunk_size, low_memory=low_memory,
+                                  engine=engine):
+        yield from page_result["dimensions"]
+
+def collect_results(page_results, sort=False):
+    """
+    Final stage of a page stream: merges iter_pages() results into the extract_dimensions_from_pdf()
+    result, de-duplicating part numbers and tolerances across pages. With sort=True the records are
+    ordered numerically by value instead of by page.
+    """
+    dimensions = []
+    part_numbers = []
+    general_tolerances = []
+    decimal_separator = None
+    stats = {}
+    for page_result in page_results:
+        dimensions.extend(page_result["dimensions"])
+        for name, count in page_result.get("stats", {}).items():
+            stats[name] = stats.get(name, 0) + count
+        decimal_separator = page_result["decimal_separator"]
+        for pn in page_result["part_numbers"]:
+            if pn['value'] not in [existing['value'] for existing in part_numbers]:
+                part_numbers.append(pn)
+        for tol in page_result["general_tolerances"]:
+            if tol['value'] not in [existing['value'] for existing in general_tolerances]:
+                general_tolerances.append(tol)
+
+    if sort:
+        dimensions = sort_by_value(dimensions)
 
     return {
-        "drawing_dimensions": unique_drawing_dimensions,
+        "dimensions": dimensions,
+        "decimal_separator": decimal_separator or detect_decimal_separator(()),
+        # Final de-duplication of unique lines for drawing dimensions
+        "drawing_dimensions": dimension_lines(dimensions),
         "part_numbers": part_numbers,
-        "general_tolerances": general_tolerances
+        "general_tolerances": general_tolerances,
+        "stats": stats,
     }
 
+def extract_dimensions_from_pdf(pdf_path, pages=None, region_matcher=None, workers=1, chunk_size=None, cache=None,
+                                low_memory=False, engine="regex"):
+    """
+    Extracts the dimensions, part numbers and general tolerances of a drawing.
+    Returns a dict with:
+    - "dimensions": Dimension records in page and reading order, one per distinct line and page
+    - "decimal_separator": "," or ".", the decimal separator detected for this document
+    - "drawing_dimensions": the sorted unique line texts (compatibility view of "dimensions")
+    - "part_numbers" and "general_tolerances": lists of {'type', 'value'} dicts from the title block
+    - "stats": the per-page line counts of extract_page, summed over the pages
+    `pdf_path` is a path or a PDF held in memory: bytes, memoryview, io.BytesIO, mmap or an open binary file,
+    opened without a copy (see open_document).
+    `pages` restricts extraction to a selection of pages (see select_pages); `workers` and `chunk_size`
+    turn on page-parallel extraction (see iter_pages).
+    `cache` (a cache.ResultCache or the path of its SQLite file) returns the stored result of an unchanged
+    file instead of extracting it again. `low_memory` bounds MuPDF's memory use and `engine` picks the
+    line classification engine (see iter_pages).
+    Use iter_pages() or iter_dimensions() to consume results while the document is processed, and an
+    Extractor to process many documents in a long-lived process.
+    """
+    if cache is not None:
+        if not hasattr(cache, "extract"):
+            # Only needed for the persistent cache
+            from cache import ResultCache
+            with ResultCache(cache) as result_cache:
+                return result_cache.extract(pdf_path, pages, region_matcher, workers, chunk_size, low_memory, engine)
+        return cache.extract(pdf_path, pages, region_matcher, workers, chunk_size, low_memory, engine)
+    return collect_results(iter_pages(pdf_path, pages, region_matcher, workers, chunk_size, low_memory=low_memory,
+                                      engine=engine))
+
+class Extractor:
+    """
+    Extraction session for long-lived processes (services, batch workers), with fixed options:
+
+        with Extractor(low_memory=True, cache="dimensions_cache.sqlite") as extractor:
+            for pdf_path in paths:
+                results = extractor.extract(pdf_path)
+
+    Every document is closed as soon as its extraction ends. close() (or leaving the with block) also
+    closes page streams that were abandoned half-way, the cache if it was given as a path, and empties
+    MuPDF's store. With low_memory=True the store is emptied after every page, so resident memory stays
+    flat across thousands of documents at the cost of re-loading shared fonts per page.
+    """
+
+    def __init__(self, region_matcher=None, workers=1, chunk_size=None, cache=None, low_memory=False, engine="regex"):
+        self.region_matcher = region_matcher
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.low_memory = low_memory
+        self.engine = engine
+        self._owns_cache = cache is not None and not hasattr(cache, "extract")
+        if self._owns_cache:
+            # Only needed for the persistent cache
+            from cache import ResultCache
+            cache = ResultCache(cache)
+        self.cache = cache
+        self._streams = weakref.WeakSet() # Open iter_pages() generators
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def iter_pages(self, pdf_path, pages=None):
+        """iter_pages() with this extractor's options; the stream is closed by close() if still open."""
+        stream = iter_pages(pdf_path, pages, self.region_matcher, self.workers, self.chunk_size,
+                            self.cache, self.low_memory, self.engine)
+        self._streams.add(stream)
+        return stream
+
+    def extract(self, pdf_path, pages=None):
+        """extract_dimensions_from_pdf() with this extractor's options."""
+        return extract_dimensions_from_pdf(pdf_path, pages, self.region_matcher, self.workers, self.chunk_size,
+                                           self.cache, self.low_memory, self.engine)
+
+    def close(self):
+        for stream in list(self._streams):
+            stream.close()
+        if self._owns_cache:
+            self.cache.close()
+        release_memory()
+
 # The main execution block (for direct testing or app integration)
 if __name__ == "__main__":
-    pdf_path = r"Test Drawing\PRT-044-0110-01.pdf"
-    results = extract_dimensions_from_pdf(pdf_path)
+    parser = argparse.ArgumentParser(description="Extract dimensions, part numbers and tolerances from a PDF drawing.")
+    parser.add_argument("pdf_path", help="PDF drawing to extract")
+    parser.add_argument("--pages", type=parse_page_spec,
+                        help='1-based sheets to extract, e.g. "1" or "1,3-5" (default: all)')
+    parser.add_argument("--workers", type=int, default=1, help="Processes for page-parallel extraction (0: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, help="Pages per parallel task (default: about 4 tasks per worker)")
+    parser.add_argument("--cache", help="SQLite result cache file; unchanged drawings are not extracted again")
+    parser.add_argument("--engine", choices=ENGINES, default="regex", help="Line classification engine (same results)")
+    args = parser.parse_args()
+
+    pdf_path = args.pdf_path
+    results = extract_dimensions_from_pdf(
+        pdf_path,
+        pages=args.pages or None,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        cache=args.cache,
+        engine=args.engine,
+    )
+
+    # Grouped by type (in registry order) and sorted numerically within each type
+    type_order = {dim_type: index for index, (_, dim_type) in enumerate(pattern_registry.get_dimension_patterns())}
+    report_dimensions = sorted(sort_by_value(results["dimensions"]),
+                               key=lambda dim: type_order.get(dim.dim_type, len(type_order)))
 
     print("\n--- Drawing Dimensions ---\n")
-    if results["drawing_dimensions"]:
-        for idx, dim in enumerate(results["drawing_dimensions"], 1):
-            print(f"{idx:02d}. {dim}")
+    if report_dimensions:
+        for idx, dim in enumerate(report_dimensions, 1):
+            print(f"{idx:02d}. [{dim.dim_type}] {dim.text}")
     else:
         print("No drawing dimensions found.\n")
 
@@ -175,7 +988,7 @@ if __name__ == "__main__":
     else:
         print("No general tolerances found.\n")
 
-    total_found = len(results["drawing_dimensions"]) + len(results["part_numbers"]) + len(results["general_tolerances"])
+    total_found = len(report_dimensions) + len(results["part_numbers"]) + len(results["general_tolerances"])
     print(f"\nTotal items extracted: {total_found}\n")
 
     # Optional: Save to a text file for easier review
@@ -184,9 +997,9 @@ if __name__ == "__main__":
         f.write("=" * 40 + "\n\n")
         
         f.write("--- Drawing Dimensions ---\n")
-        if results["drawing_dimensions"]:
-            for idx, dim in enumerate(results["drawing_dimensions"], 1):
-                f.write(f"{idx:02d}. {dim}\n")
+        if report_dimensions:
+            for idx, dim in enumerate(report_dimensions, 1):
+                f.write(f"{idx:02d}. [{dim.dim_type}] {dim.text}\n")
         else:
             f.write("No drawing dimensions found.\n")
         f.write("\n")
@@ -0,0 +1,96 @@
+"""
+Numeric normalisation of dimension tokens.
+
+Drawings mix "1,250", ",719", "0.01", "3/16" and "8,89". Whether a comma is a decimal or a
+thousands separator is decided once per document from a sample of its tokens, then the whole
+batch of tokens is converted to a float64 array with NumPy string operations instead of a
+float() call per token.
+"""
+import re
+
+import numpy as np
+
+# Sample size for the per-document separator vote
+SEPARATOR_SAMPLE_SIZE = 256
+
+# Decisive token shapes: "8,89" / ",719" (comma decimal) vs. "1,250.5" / "1,250,000" (comma thousands)
+_DECIMAL_COMMA = re.compile(r'^[0-9]*,(?:[0-9]{1,2}|[0-9]{4,})$|^,[0-9]+$')
+_THOUSANDS_COMMA = re.compile(r'^[0-9]{1,3}(?:,[0-9]{3})+\.[0-9]*$|^[0-9]{1,3}(?:,[0-9]{3}){2,}$')
+
+def detect_decimal_separator(tokens, default=",", sample_size=SEPARATOR_SAMPLE_SIZE):
+    """
+    Returns "," if the comma is a decimal separator in this document, "." if it groups thousands.
+    Only the first `sample_size` tokens are inspected. Ambiguous tokens such as "1,250" do not vote;
+    without decisive tokens the `default` is returned (our drawings use decimal commas).
+    """
+    decimal_votes = 0
+    thousands_votes = 0
+    sampled = 0
+    for token in tokens:
+        if not token or "," not in token:
+            continue
+        if _DECIMAL_COMMA.match(token):
+            decimal_votes += 1
+        elif _THOUSANDS_COMMA.match(token):
+            thousands_votes += 1
+        sampled += 1
+        if sampled >= sample_size:
+            break
+
+    if decimal_votes == thousands_votes:
+        return default
+    return "," if decimal_votes > thousands_votes else "."
+
+def parse_values(tokens, decimal=","):
+    """
+    Converts a batch of numeric tokens to a float64 array in one go.
+    Handles decimals with either separator, leading-separator values (".750", ",719") and fractions
+    ("3/16"). Tokens that are not plain numbers (thread callouts, None, "2²" from a registered pattern)
+    become NaN.
+    """
+    values = np.full(len(tokens), np.nan)
+    if len(tokens) == 0:
+        return values
+
+    strings = np.array(["" if token is None else token.strip() for token in tokens], dtype=str)
+    if decimal == ",":
+        strings = np.char.replace(strings, ",", ".")
+    else:
+        strings = np.char.replace(strings, ",", "")
+
+    numerators, slashes, denominators = np.char.partition(strings, "/").T
+    is_fraction = slashes == "/"
+
+    # A plain number is all digits once a single decimal point is removed (and not just the point).
+    # Decimal digits only: isdigit() also accepts superscripts such as '²', which float() rejects.
+    plain_digits = np.char.replace(numerators, ".", "", count=1)
+    numerator_ok = np.char.isdecimal(plain_digits)
+    denominator_ok = np.char.isdecimal(denominators)
+
+    is_decimal = numerator_ok & ~is_fraction
+    values[is_decimal] = numerators[is_decimal].astype(np.float64)
+
+    is_fraction &= np.char.isdecimal(numerators) & denominator_ok
+    fraction_values = numerators[is_fraction].astype(np.float64) / denominators[is_fraction].astype(np.float64)
+    # x/0 is not a dimension
+    fraction_values[~np.isfinite(fraction_values)] = np.nan
+    values[is_fraction] = fraction_values
+    return values
+
+def assign_values(dimensions, decimal=None):
+    """
+    Fills Dimension.value for a document's records from their tokens, in one batch.
+    The separator is detected from the tokens unless given. Returns the separator used.
+    """
+    tokens = [dimension.token for dimension in dimensions]
+    if decimal is None:
+        decimal = detect_decimal_separator(tokens)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = parse_values(tokens, decimal)
+    for dimension, value in zip(dimensions, values.tolist()):
+        dimension.value = None if value != value else value # NaN check
+    return decimal
+
+def sort_by_value(dimensions):
+    """Returns the records sorted numerically by value (unparsed values last, then by text)."""
+    return sorted(dimensions, key=lambda dimension: (dimension.value is None, dimension.value or 0.0, dimension.text))
@@ -0,0 +1,307 @@
+"""
+Regex registry shared by the dimension extractor.
+
+The patterns are compiled once at import and published as an immutable tuple of
+(compiled_pattern, dim_type) pairs, ordered by priority: a line is classified by the
+first pattern that matches it. Use register_pattern() to add patterns without editing
+extractor.py; it swaps in a new tuple, so callers iterating the old one are not affected.
+"""
+import bisect
+import re
+
+# --- Regex Patterns for specific dimension types (ordered by specificity) ---
+DIMENSION_PATTERNS = (
+    # 1. Diameter (e.g., Ø.201, ⌀.201, 8X Ø.201, 8X⌀.201, 02.13, O2.13)
+    # This regex looks for:
+    # - Optional multiplier (e.g., "8X", "8 X")
+    # - Diameter symbol (Ø or ⌀) OR common OCR misinterpretations like '0' or 'O'
+    # - Optional whitespace after the symbol/character
+    # - The numeric value (decimal or fraction)
+    # - Optional units (e.g., ", 'in", "mm", "cm")
+    # The leading lookahead only lists the characters a match can start with, so other positions fail fast.
+    # The negative lookahead skips starts inside a run of whitespace or of digits (other than a '0', which
+    # may be the symbol): the start one character earlier matches the same way, and retrying every start of
+    # a long run made garbled lines of spaces or digits take cubic time.
+    (re.compile(r'(?=[\dXx\sØ⌀0O])(?!(?<=\s)\s|(?<=\d)[^\D0])(\d*\s*[Xx])?[\s]*[Ø⌀0O][\s]*([0-9]+[.,]?[0-9]*|[0-9]+/[0-9]+)(?:["\'in]*|mm|cm)?', re.IGNORECASE), "Diameter"),
+    # 2. Radius (e.g., R2.250, R17/32) - prioritize fraction over decimal
+    (re.compile(r'R\s*([0-9]+/[0-9]+|[0-9]+[.,]?[0-9]*)(?:["\'in]*|mm|cm)?', re.IGNORECASE), "Radius"),
+    # Patterns 3-5 start with a digit run; a match can only start where the run does (the lookbehind),
+    # so a long run of digits is scanned once instead of once per digit.
+    # 3. Angles (e.g., 60°, 100°); the decimal part is grouped so a digit run can only be split one way
+    # when the ° is missing ('[0-9]+[.,]?[0-9]*' tried every split)
+    (re.compile(r'(?<![0-9])([0-9]+(?:[.,][0-9]*)?)\s*°', re.IGNORECASE), "Angle"),
+    # 4. Thread/Bolt Callouts (e.g., 10-32 UNF)
+    (re.compile(r'(?<![0-9])([0-9]+-[0-9]+(?:\s*[A-Z]{2,4})?)', re.IGNORECASE), "Thread"),
+    # 5. Linear Fractions (e.g., 3/16, 1/2)
+    (re.compile(r'(?<![0-9])([0-9]+/[0-9]+)(?:["\'in]*|mm|cm)?', re.IGNORECASE), "Fraction"),
+    # 6. Basic Linear Dimensions (e.g., 4.50, 1,500, .750, 8.89, 10,06) - broad, so last
+    (re.compile(r'(?=[0-9.,])(?<![A-Za-z0-9])([0-9]*[.,][0-9]+|[0-9]+)(?:["\'in]*|mm|cm)?(?![A-Za-z0-9])', re.IGNORECASE), "Linear"),
+)
+
+# Values of Diameter lines, which are not read off the Diameter pattern's last group: the pattern also
+# takes any '0' followed by a digit for the symbol, so on "Ø.201" it fails at the Ø and matches the '0' of
+# ".201" ("1"), and it classifies plain numbers such as "1.005" or "100" by a '0' inside them ("5", "0").
+# 1. An explicit symbol: the number right after Ø or ⌀
+DIAMETER_VALUE_PATTERN = re.compile(r'[Ø⌀]\s*([0-9]*[.,][0-9]+|[0-9]+(?:/[0-9]+)?)', re.IGNORECASE)
+# 2. An OCR'd symbol ("02.13", "O2.13"): a '0' or 'O' that does not continue a number, then the number
+OCR_DIAMETER_VALUE_PATTERN = re.compile(r'(?<![0-9.,])[0O]\s*([0-9]+/[0-9]+|[0-9]+[.,]?[0-9]*)', re.IGNORECASE)
+# 3. Otherwise the '0' was part of a number: the whole number holding it ('0' after a digit or separator)
+NUMBER_PATTERN = re.compile(r'[.,]?[0-9]+(?:[.,][0-9]+)*')
+EMBEDDED_ZERO_PATTERN = re.compile(r'[0-9.,]0[0-9]')
+
+# --- Patterns for Part Number and General Tolerances in Title Block ---
+PART_NUMBER_PATTERN = re.compile(r'(PRT-[0-9]{3}-[0-9]{4}-[0-9]{2})', re.IGNORECASE)
+# The sign must not continue a word or number, so the dashes of part numbers ("PRT-044-0110-01") are not tolerances
+TOLERANCE_PATTERN = re.compile(r'(?<![A-Za-z0-9])[\+\-±][\s]*([0-9]+[.,]?[0-9]*|[0-9]+/[0-9]+)(?:["\'in]*|mm|cm)?', re.IGNORECASE)
+
+# Every built-in pattern needs an ASCII digit, so lines without one cannot match them and skip the regexes
+# (see LineClassifier.may_match). The symbols (Ø, ⌀, °, ±, R) are not enough on their own.
+PREFILTER_CHARACTERS = frozenset("0123456789")
+_BUILTIN_PATTERNS = frozenset((compiled.pattern, compiled.flags) for compiled, _ in DIMENSION_PATTERNS)
+# The built-in registry as shipped, which tokenizer.py reproduces (see LineClassifier.default)
+_DEFAULT_ENTRIES = tuple((compiled.pattern, compiled.flags, dim_type) for compiled, dim_type in DIMENSION_PATTERNS)
+
+# What every match of a built-in pattern contains, as a regex with no lookaround that is far cheaper to scan
+# for (see LineClassifier.classify_many). Linear has no such test beyond the digit, registered patterns none.
+_GATES = {
+    "Diameter": r'[Ø⌀0O]\s*[0-9]',
+    "Radius": r'R\s*[0-9]',
+    "Angle": r'°',
+    "Thread": r'[0-9]-[0-9]',
+    "Fraction": r'[0-9]/[0-9]',
+}
+_BUILTIN_GATES = {(compiled.pattern, compiled.flags): re.compile(_GATES[dim_type], compiled.flags)
+                  for compiled, dim_type in DIMENSION_PATTERNS if dim_type in _GATES}
+
+# Joins the lines of a page for classify_many(); no gate can match it
+LINE_SEPARATOR = "\x00"
+
+_CLASSIFIER = None
+
+def get_dimension_patterns():
+    """
+    Returns the current (compiled_pattern, dim_type) tuple.
+    Read it once per document rather than caching it at import, so registered patterns are picked up.
+    """
+    return DIMENSION_PATTERNS
+
+def register_pattern(pattern, dim_type, before=None):
+    """
+    Adds a dimension pattern to the shared registry and returns the new registry tuple.
+    `pattern` may be a string (compiled with re.IGNORECASE) or a compiled regex. Its last capturing
+    group, if any, should hold the numeric value (it becomes Dimension.token).
+    By default the pattern gets the lowest priority; pass `before="Linear"` (any registered
+    dim_type) to try it ahead of the first pattern of that type.
+    Registered patterns may match lines without digits, so their presence turns the digit prefilter off.
+    """
+    global DIMENSION_PATTERNS
+
+    if isinstance(pattern, str):
+        pattern = re.compile(pattern, re.IGNORECASE)
+
+    entries = list(DIMENSION_PATTERNS)
+    position = len(entries)
+    if before is not None:
+        positions = [index for index, (_, existing_type) in enumerate(entries) if existing_type == before]
+        if not positions:
+            raise ValueError(f"Unknown dimension type: {before!r}")
+        position = positions[0]
+
+    entries.insert(position, (pattern, dim_type))
+    DIMENSION_PATTERNS = tuple(entries)
+    return DIMENSION_PATTERNS
+
+def set_dimension_patterns(entries):
+    """
+    Replaces the whole registry with `entries`, a tuple of (compiled_pattern, dim_type) pairs.
+    Used by worker processes to mirror the registry of the process that started them.
+    """
+    global DIMENSION_PATTERNS
+    entries = tuple(entries)
+    if entries != DIMENSION_PATTERNS:
+        DIMENSION_PATTERNS = entries
+
+def get_classifier():
+    """Returns the LineClassifier for the current registry, building it on first use."""
+    global _CLASSIFIER
+    if _CLASSIFIER is None or _CLASSIFIER.entries is not DIMENSION_PATTERNS:
+        _CLASSIFIER = LineClassifier(DIMENSION_PATTERNS)
+    return _CLASSIFIER
+
+def _without_captures(source):
+    """
+    Rewrites the capturing groups of a regex source as non-capturing groups.
+    Escapes and character classes are copied verbatim; named groups lose their names.
+    """
+    if re.search(r'\(\?P=|\\[1-9]', source):
+        raise re.error("backreferences cannot be made non-capturing")
+
+    out = []
+    index = 0
+    in_class = False
+    while index < len(source):
+        char = source[index]
+        if char == '\\':
+            out.append(source[index:index + 2])
+            index += 2
+            continue
+        if in_class:
+            in_class = char != ']'
+        elif char == '[':
+            # A ']' right after '[' or '[^' is a literal, not the end of the class
+            end = index + 1
+            if source.startswith('^', end):
+                end += 1
+            if source.startswith(']', end):
+                end += 1
+            out.append(source[index:end])
+            index = end
+            in_class = True
+            continue
+        elif char == '(' and source.startswith('(?P<', index):
+            out.append('(?:')
+            index = source.index('>', index) + 1
+            continue
+        elif char == '(' and not source.startswith('(?', index):
+            out.append('(?:')
+            index += 1
+            continue
+        out.append(char)
+        index += 1
+    return "".join(out)
+
+def _branch(compiled_pattern):
+    """Wraps a registry pattern as one capturing branch of the combined regex, keeping its own flags."""
+    flags = "".join(letter for flag, letter in ((re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x"))
+                    if compiled_pattern.flags & flag)
+    source = _without_captures(compiled_pattern.pattern)
+    return f"((?{flags}:{source}))" if flags else f"({source})"
+
+class LineClassifier:
+    """
+    Classifies lines against the registry with first-match-wins semantics and reports their tokens.
+    For tokens() and classify_combined() the patterns are also folded into one alternation (in priority
+    order, inner groups made non-capturing since capture bookkeeping dominates the cost of a large
+    alternation in `re`), so a single finditer pass yields every token on a line with the pattern that
+    produced it. Extraction never uses it, so it is only compiled on first use.
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        # Registered patterns may not need a digit: lines are only prefiltered if all patterns are built-in
+        self.builtin = all((compiled.pattern, compiled.flags) in _BUILTIN_PATTERNS for compiled, _ in entries)
+        # The hand-written tokenizer only knows the built-in registry, in its shipped order
+        self.default = tuple((compiled.pattern, compiled.flags, dim_type) for compiled, dim_type in entries) == _DEFAULT_ENTRIES
+        self._combined = None # (alternation, higher), see _combined_regexes()
+
+    def _combined_regexes(self):
+        """
+        The combined alternation and higher[k], the alternation of the patterns that outrank pattern k,
+        compiled on first use. The alternation is None for patterns that cannot be combined.
+        """
+        if self._combined is None:
+            try:
+                branches = [_branch(compiled_pattern) for compiled_pattern, _ in self.entries]
+                regex = re.compile("|".join(branches)) if branches else None
+                higher = [None] + [re.compile("|".join(branches[:k])) for k in range(1, len(branches))]
+            except re.error:
+                # Patterns that cannot be combined (e.g. backreferences): no token stream, classify() still works
+                regex, higher = None, None
+            self._combined = (regex, higher)
+        return self._combined
+
+    def may_match(self, text):
+        """
+        Cheap prefilter run before classify(): False if no pattern can match text (for the built-in
+        patterns, a line without a digit). A set test, far cheaper than a regex search.
+        """
+        return not self.builtin or not PREFILTER_CHARACTERS.isdisjoint(text)
+
+    def tokens(self, text):
+        """Yields (dim_type, start, end) for every non-overlapping token in text, left to right."""
+        regex, _ = self._combined_regexes()
+        if regex is None:
+            return
+        for match in regex.finditer(text):
+            yield self.entries[match.lastindex - 1][1], match.start(), match.end()
+
+    def classify(self, text):
+        """
+        Returns the (compiled_pattern, dim_type) entry of the first registry pattern that matches text,
+        or None.
+        This stays a loop over the individual patterns: each one keeps re's literal/charset prefix scan,
+        which the alternation loses, so with the built-in set it beats classify_combined() (see
+        `python benchmark.py classifier`).
+        """
+        for entry in self.entries:
+            if entry[0].search(text):
+                return entry
+        return None
+
+    def match(self, text):
+        """Like classify(), but returns (entry, match) with the pattern's first match on text, or None."""
+        for entry in self.entries:
+            match = entry[0].search(text)
+            if match:
+                return entry, match
+        return None
+
+    def classify_many(self, texts):
+        """
+        Bulk form of match() for the lines of a page: returns one (entry, match) or None per text.
+        The texts are joined into one buffer with LINE_SEPARATOR and each pattern's gate (see _GATES) is
+        scanned for over the whole buffer in one call; gate offsets map back to their line through the
+        prefix array of line starts (binary search). The pattern itself then only runs on the lines its
+        gate hit that are not classified yet, so results equal match() on each text.
+        Running the patterns themselves over the buffer saves little: the cost is in re's matching, not
+        in the per-line call (see `python benchmark.py bulk`).
+        """
+        buffer = LINE_SEPARATOR.join(texts)
+        starts = [0] * len(texts)
+        for index in range(1, len(texts)):
+            starts[index] = starts[index - 1] + len(texts[index - 1]) + 1
+
+        found = [None] * len(texts)
+        for entry in self.entries:
+            compiled_pattern = entry[0]
+            gate = _BUILTIN_GATES.get((compiled_pattern.pattern, compiled_pattern.flags))
+            if gate is None:
+                candidates = [index for index in range(len(texts)) if found[index] is None]
+            else:
+                candidates = []
+                gate_match = gate.search(buffer)
+                while gate_match:
+                    index = bisect.bisect_right(starts, gate_match.start()) - 1
+                    if found[index] is None:
+                        candidates.append(index)
+                    # One hit is enough: resume at the next line
+                    if index + 1 == len(texts):
+                        break
+                    gate_match = gate.search(buffer, starts[index + 1])
+            for index in candidates:
+                match = compiled_pattern.search(texts[index])
+                if match:
+                    found[index] = (entry, match)
+        return found
+
+    def classify_combined(self, text):
+        """
+        Same result as classify(), using the combined alternation.
+        The leftmost hit gives a first candidate; each further search only looks for patterns that outrank
+        the current candidate, to the right of it.
+        """
+        regex, higher = self._combined_regexes()
+        if regex is None:
+            return self.classify(text)
+
+        match = regex.search(text)
+        if match is None:
+            return None
+        best = match.lastindex - 1
+        while best:
+            # Nothing matched left of `match`, and the outranking patterns all failed at its start
+            match = higher[best].search(text, match.start() + 1)
+            if match is None:
+                break
+            best = match.lastindex - 1
+        return self.entries[best]
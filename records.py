@@ -0,0 +1,48 @@
+"""
+Result records produced by the dimension extractor.
+"""
+class Dimension:
+    """
+    One dimension line found in the drawing area of a page.
+    - text: the raw line text
+    - dim_type: the registry type that classified it (e.g. "Diameter")
+    - token: the numeric token matched by that pattern (for diameters, the number after the symbol, see
+      extractor._value_token),
+      value: its parsed float or None (see numeric.py)
+    - page: 0-based page index, bbox: (x0, y0, x1, y1) of its first occurrence on the page
+    - count: how many times the same line appears on the page
+    """
+    __slots__ = ("text", "dim_type", "token", "value", "page", "bbox", "count")
+
+    def __init__(self, text, dim_type, token, value, page, bbox, count=1):
+        self.text = text
+        self.dim_type = dim_type
+        self.token = token
+        self.value = value
+        self.page = page
+        self.bbox = bbox
+        self.count = count
+
+    def __repr__(self):
+        return (f"Dimension({self.text!r}, {self.dim_type!r}, value={self.value!r}, "
+                f"page={self.page}, bbox={self.bbox!r}, count={self.count})")
+
+    def __eq__(self, other):
+        if not isinstance(other, Dimension):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __reduce__(self):
+        # Positional arguments unpickle about twice as fast as the default slot-state dict
+        # (worker results and cached results are pickled)
+        return (Dimension, tuple(getattr(self, name) for name in self.__slots__))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+def dimension_lines(dimensions):
+    """
+    The pre-record result shape: sorted unique line texts.
+    Kept as the "drawing_dimensions" entry so existing consumers (dimension_app.py) keep working.
+    """
+    return sorted(set(dimension.text for dimension in dimensions))
@@ -0,0 +1,233 @@
+"""
+Hand-written dimension tokenizer, an alternative engine to the regex cascade of patterns.py.
+
+scan() walks a line once and cuts it into typed tokens with character offsets: digit runs, decimal
+separators, multipliers ("8X"), diameter and radius prefixes, degree signs, dashes, slashes, letters
+and whitespace. match() reads the line's dimension off those tokens with the rules of the built-in
+patterns, in their priority order: fractions, decimals with either separator, thread callouts and
+unit suffixes are recognised from token sequences instead of by six regexes re-scanning the line.
+
+It reproduces the built-in patterns exactly, quirks included ("105" holds a '0' read as a diameter
+symbol, as the OCR-tolerant Diameter pattern does), so it is only used when the registry holds
+exactly those patterns (see LineClassifier.default). `python benchmark.py tokenizer` checks that
+both engines agree on a corpus and compares their speed.
+"""
+
+# Character sets of the built-in patterns, as `re` matches them with IGNORECASE (Unicode case folding
+# adds İ, ı, ſ and the Kelvin sign to the ASCII letters)
+DIGITS = frozenset("0123456789")
+LETTERS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyzİıſK")
+ALPHANUMERIC = LETTERS | DIGITS
+UNIT_CHARACTERS = frozenset("\"'iInNİı")
+METRIC_UNITS = frozenset(("mm", "mM", "Mm", "MM", "cm", "cM", "Cm", "CM"))
+
+# Token kinds of single characters; other characters are "space", "decimal" (a non-ASCII digit),
+# "letter" or "other"
+CHARACTER_KINDS = {
+    "X": "multiplier", "x": "multiplier",
+    "Ø": "diameter", "ø": "diameter", "⌀": "diameter", "O": "diameter", "o": "diameter",
+    "R": "radius", "r": "radius",
+    ".": "separator", ",": "separator",
+    "°": "degree", "-": "dash", "/": "slash",
+}
+CHARACTER_KINDS.update({digit: "digits" for digit in DIGITS})
+CHARACTER_KINDS.update({letter: "letter" for letter in LETTERS if letter not in CHARACTER_KINDS})
+
+def scan(text):
+    """
+    Cuts text into (kind, start, end) tokens in one pass. Runs of ASCII digits, of other decimal digits
+    and of whitespace are one token each; every other character is a token of its own.
+    """
+    kinds, starts, ends = _scan(text)
+    return list(zip(kinds, starts, ends))
+
+def _scan(text):
+    # scan() as parallel lists, which the rules below index faster than tuples
+    kinds = []
+    starts = []
+    index = 0
+    length = len(text)
+    get_kind = CHARACTER_KINDS.get
+    while index < length:
+        char = text[index]
+        kind = get_kind(char)
+        end = index + 1
+        if kind == "digits":
+            while end < length and text[end] in DIGITS:
+                end += 1
+        elif kind is None:
+            if char.isspace():
+                kind = "space"
+                while end < length and text[end].isspace():
+                    end += 1
+            elif char.isdecimal():
+                kind = "decimal"
+                while end < length and text[end].isdecimal() and text[end] not in DIGITS:
+                    end += 1
+            else:
+                kind = "other"
+        kinds.append(kind)
+        starts.append(index)
+        index = end
+    # Tokens are contiguous: each one ends where the next starts
+    return kinds, starts, starts[1:] + [length]
+
+def match(text):
+    """
+    Returns (dim_type, start, end) for the first built-in pattern (by priority) that matches text, with
+    the offsets of its numeric token, or None. Same result as LineClassifier.match() on the built-in
+    registry.
+    """
+    kinds, starts, ends = _scan(text)
+    # A rule only runs if the line has the tokens it needs: a symbol (or a '0'), an R, a degree sign,
+    # a dash or a slash
+    return ((("diameter" in kinds or "0" in text) and _diameter(text, kinds, starts, ends))
+            or ("radius" in kinds and _radius(kinds, starts, ends))
+            or ("degree" in kinds and _angle(kinds, starts, ends))
+            or ("dash" in kinds and _thread(text, kinds, starts, ends))
+            or ("slash" in kinds and _fraction(kinds, starts, ends))
+            or _linear(text, kinds, starts, ends))
+
+def classify(text):
+    """Returns (dim_type, token) like match(), with the numeric token as a string, or None."""
+    found = match(text)
+    return found and (found[0], text[found[1]:found[2]])
+
+# --- Pattern rules over the token lists; `i` indexes tokens, other positions are character offsets ---
+
+def _skip_space(kinds, i):
+    return i + 1 if i < len(kinds) and kinds[i] == "space" else i
+
+def _number_end(kinds, ends, i):
+    """End of '[0-9]+[.,]?[0-9]*' over the digits token i: the digits, a separator and its digits."""
+    if i + 1 < len(kinds) and kinds[i + 1] == "separator":
+        if i + 2 < len(kinds) and kinds[i + 2] == "digits":
+            return ends[i + 2]
+        return ends[i + 1]
+    return ends[i]
+
+def _symbol_number(kinds, starts, ends, i, position):
+    """
+    For a diameter symbol at `position` (token i, or a '0' inside digits token i), the (start, end) of
+    the number that follows it after optional whitespace, or None.
+    """
+    if position + 1 < ends[i]:
+        # A '0' followed by more digits of its run
+        return position + 1, _number_end(kinds, ends, i)
+    j = _skip_space(kinds, i + 1)
+    if j < len(kinds) and kinds[j] == "digits":
+        return starts[j], _number_end(kinds, ends, j)
+    return None
+
+def _diameter(text, kinds, starts, ends):
+    # A match is '(\d*\s*[Xx])?\s*' then a symbol (Ø ⌀ O, or a '0' as OCR'd Ø) then '\s*' and the number.
+    # Of the first match with a multiplier and the first without one, the one starting first wins; at
+    # the same start the multiplier form is tried first.
+    with_multiplier = without_multiplier = None
+    for i, kind in enumerate(kinds):
+        if kind == "diameter" or kind == "digits":
+            if without_multiplier is not None:
+                continue
+            start, end = starts[i], ends[i]
+            position = start if kind == "diameter" else text.find("0", start, end)
+            while position != -1:
+                number = _symbol_number(kinds, starts, ends, i, position)
+                if number:
+                    # The match starts at the whitespace before the symbol, if any
+                    match_start = starts[i - 1] if position == start and i and kinds[i - 1] == "space" else position
+                    without_multiplier = (match_start, number)
+                    break
+                position = text.find("0", position + 1, end) if kind == "digits" else -1
+        elif kind == "multiplier" and with_multiplier is None:
+            j = _skip_space(kinds, i + 1)
+            if j < len(kinds) and (kinds[j] == "diameter" or kinds[j] == "digits" and text[starts[j]] == "0"):
+                number = _symbol_number(kinds, starts, ends, j, starts[j])
+                if number:
+                    # The match starts at the digits and whitespace before the multiplier
+                    b = i - 1
+                    if b >= 0 and kinds[b] == "space":
+                        b -= 1
+                    while b >= 0 and (kinds[b] == "digits" or kinds[b] == "decimal"):
+                        b -= 1
+                    with_multiplier = (starts[b + 1], number)
+        if with_multiplier is not None and without_multiplier is not None:
+            break
+
+    if with_multiplier is not None and (without_multiplier is None or with_multiplier[0] <= without_multiplier[0]):
+        return ("Diameter",) + with_multiplier[1]
+    if without_multiplier is not None:
+        return ("Diameter",) + without_multiplier[1]
+    return None
+
+def _radius(kinds, starts, ends):
+    # 'R\s*([0-9]+/[0-9]+|[0-9]+[.,]?[0-9]*)'
+    for i, kind in enumerate(kinds):
+        if kind != "radius":
+            continue
+        j = _skip_space(kinds, i + 1)
+        if j < len(kinds) and kinds[j] == "digits":
+            if j + 2 < len(kinds) and kinds[j + 1] == "slash" and kinds[j + 2] == "digits":
+                return "Radius", starts[j], ends[j + 2]
+            return "Radius", starts[j], _number_end(kinds, ends, j)
+    return None
+
+def _angle(kinds, starts, ends):
+    # '([0-9]+(?:[.,][0-9]*)?)\s*°' from the start of a digit run
+    for i, kind in enumerate(kinds):
+        if kind != "digits":
+            continue
+        last = i
+        if i + 1 < len(kinds) and kinds[i + 1] == "separator":
+            last = i + 2 if i + 2 < len(kinds) and kinds[i + 2] == "digits" else i + 1
+        j = _skip_space(kinds, last + 1)
+        if j < len(kinds) and kinds[j] == "degree":
+            return "Angle", starts[i], ends[last]
+    return None
+
+def _thread(text, kinds, starts, ends):
+    # '[0-9]+-[0-9]+(?:\s*[A-Z]{2,4})?' from the start of a digit run
+    for i, kind in enumerate(kinds):
+        if kind == "digits" and i + 2 < len(kinds) and kinds[i + 1] == "dash" and kinds[i + 2] == "digits":
+            end = ends[i + 2]
+            j = _skip_space(kinds, i + 3)
+            position = starts[j] if j < len(kinds) else len(text)
+            letters = 0
+            while letters < 4 and position + letters < len(text) and text[position + letters] in LETTERS:
+                letters += 1
+            if letters >= 2:
+                end = position + letters
+            return "Thread", starts[i], end
+    return None
+
+def _fraction(kinds, starts, ends):
+    # '[0-9]+/[0-9]+' from the start of a digit run
+    for i, kind in enumerate(kinds):
+        if kind == "digits" and i + 2 < len(kinds) and kinds[i + 1] == "slash" and kinds[i + 2] == "digits":
+            return "Fraction", starts[i], ends[i + 2]
+    return None
+
+def _unit_ends_word(text, end):
+    """Whether '(?:["\\'in]*|mm|cm)?(?![A-Za-z0-9])' matches at `end`."""
+    stop = end
+    while stop < len(text) and text[stop] in UNIT_CHARACTERS:
+        stop += 1
+    # Any length of the unit run works if the character after it is not alphanumeric; a quote is not
+    if stop == len(text) or text[stop] not in ALPHANUMERIC or '"' in text[end:stop] or "'" in text[end:stop]:
+        return True
+    return text[end:end + 2] in METRIC_UNITS and (end + 2 == len(text) or text[end + 2] not in ALPHANUMERIC)
+
+def _linear(text, kinds, starts, ends):
+    # '([0-9]*[.,][0-9]+|[0-9]+)' with units, not touching letters or digits on either side
+    for i, kind in enumerate(kinds):
+        if kind != "digits" and kind != "separator":
+            continue
+        start = starts[i]
+        if start and text[start - 1] in ALPHANUMERIC:
+            continue
+        number = i if kind == "separator" else i + 1
+        if (number + 1 < len(kinds) and kinds[number] == "separator" and kinds[number + 1] == "digits"
+                and _unit_ends_word(text, ends[number + 1])):
+            return "Linear", start, ends[number + 1]
+        if kind == "digits" and _unit_ends_word(text, ends[i]):
+            return "Linear", start, ends[i]
+    return None